@@ -220,7 +220,8 @@ class CodaClient:
         table_id: str, 
         limit: int = 100,
         use_column_names: bool = True,
-        value_format: str = 'simple'
+        value_format: str = 'simple',
+        page_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Get rows from a table.
@@ -231,9 +232,10 @@ class CodaClient:
             limit: Maximum number of rows to return
             use_column_names: Return column names instead of IDs
             value_format: 'simple', 'simpleWithArrays', or 'rich'
+            page_token: Token from a previous response's 'nextPageToken' to fetch the next page
             
         Returns:
-            Table rows data
+            Table rows data (includes 'nextPageToken' when more rows are available)
         """
         print(f"\n📥 Fetching Table Rows:")
         print(f"   Doc ID: {doc_id}")
@@ -249,6 +251,8 @@ class CodaClient:
             'useColumnNames': use_column_names,
             'valueFormat': value_format
         }
+        if page_token:
+            params['pageToken'] = page_token
         
         response = self._make_request('GET', f'/docs/{doc_id}/tables/{table_id}/rows', params=params)
         
@@ -11,7 +11,7 @@ Crawls only the key experiment tracking views:
 Daily Update Behavior:
 ----------------------
 When run daily, this script will:
-1. Check if today's data exists in Snowflake
+1. CREATE the Snowflake table if it does not exist yet
 2. DELETE today's data if it exists (prevents duplicates)
 3. INSERT fresh data from Coda
 
@@ -41,18 +41,25 @@ ORDER BY snapshot_date DESC, view_name;
 
 Usage:
     python crawl_coda_experiments.py
+    python crawl_coda_experiments.py --upgrade  # once, for tables created before brief_content_hash
 """
 
+import os
 import sys
+import argparse
 import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Set, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Set, Optional, Iterator, Callable
 import pandas as pd
 from dotenv import load_dotenv
 
 from coda_service.coda_client import CodaClient
 from utils.snowflake_connection import SnowflakeHook
 from utils.logger import get_logger
+from utils.rate_limiter import RateLimiter
 from google_docs_service.google_docs_crawler import get_google_docs_crawler, GoogleDocContent
 
 # Load environment variables
@@ -68,6 +75,15 @@ SNOWFLAKE_SCHEMA = "fionafan"
 SNOWFLAKE_TABLE = "coda_experiments_focused"
 FETCH_LIMIT = 500  # Rows per table
 
+# Bulk-load options for write_pandas (Parquet + PUT + COPY INTO). Snappy is much
+# cheaper to encode than the default gzip for the long brief_content/brief_summary
+# text, and 8 upload threads load the staged files in parallel.
+WRITE_PANDAS_OPTIONS = {
+    'compression': 'snappy',
+    'parallel': 8,
+    'use_logical_type': True,
+}
+
 # Only crawl these specific views
 TARGET_VIEWS = [
     "Live Experiments",
@@ -79,6 +95,24 @@ TARGET_VIEWS = [
 # Column names that may contain Google Doc links
 BRIEF_COLUMN_NAMES = ['brief', 'brief_link', 'brief_url', 'design_doc', 'prd']
 
+# Google Docs API limits for brief crawling: concurrent requests in flight,
+# request starts per second, and docs submitted per wave
+GDOC_MAX_INFLIGHT = int(os.getenv("GDOC_MAX_INFLIGHT", "10"))
+GDOC_MAX_QPS = float(os.getenv("GDOC_MAX_QPS", "10"))
+GDOC_BATCH_SIZE = 100
+
+# Clustering key for the snapshot table. Daily DELETE/lookup predicates use the
+# same TO_DATE(fetched_at) expression so Snowflake can prune micro-partitions.
+SNAPSHOT_CLUSTER_BY = ['TO_DATE(fetched_at)', 'view_name']
+
+# Columns added by the brief crawl
+BRIEF_OUTPUT_COLUMNS = ['brief_content', 'brief_images_description', 'brief_summary', 'brief_content_hash']
+
+
+# Patterns for Google Doc URLs (bare and inside markdown links)
+GDOC_URL_PATTERN = re.compile(r'https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+')
+GDOC_MARKDOWN_PATTERN = re.compile(r'\[.*?\]\((https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+[^)]*)\)')
+
 
 def extract_google_doc_url(value: Any) -> Optional[str]:
     """
@@ -95,94 +129,175 @@ def extract_google_doc_url(value: Any) -> Optional[str]:
     Returns:
         Google Doc URL or None
     """
-    if not value or not isinstance(value, str):
+    # Check the type first: empty cells are pd.NA in Arrow-backed frames, and
+    # the truthiness of NA is ambiguous
+    if not isinstance(value, str) or not value:
         return None
     
-    value = value.strip()
+    return _extract_google_doc_url_cached(value)
+
+
+@lru_cache(maxsize=4096)
+def _extract_google_doc_url_cached(value: str) -> Optional[str]:
+    """
+    Cached URL extraction for string cell values.
     
-    # Pattern for Google Doc URLs
-    gdoc_pattern = r'https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+'
+    The same brief string shows up in several views (and again when comparing
+    against the previous day's snapshot), so repeated values skip the regex scan.
+    """
+    value = value.strip()
     
     # Try to find Google Doc URL in the value
-    match = re.search(gdoc_pattern, value)
+    match = GDOC_URL_PATTERN.search(value)
     if match:
         return match.group(0)
     
     # Check for markdown link format [text](url)
-    markdown_pattern = r'\[.*?\]\((https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+[^)]*)\)'
-    match = re.search(markdown_pattern, value)
+    match = GDOC_MARKDOWN_PATTERN.search(value)
     if match:
         return match.group(1)
     
     return None
 
 
-def get_previous_day_brief_data() -> Dict[str, Dict[str, Any]]:
+def content_hash(text: Optional[str]) -> Optional[str]:
     """
-    Fetch the previous day's brief data from Snowflake.
+    Fingerprint brief text (40 hex chars) so unchanged documents can be detected.
     
+    Args:
+        text: Document text content
+        
     Returns:
-        Dictionary mapping row_id to {brief_url, brief_content, brief_images_description, brief_summary}
+        Hex digest, or None for empty text
+    """
+    if not text:
+        return None
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()
+
+
+def upgrade_snapshot_table(hook: SnowflakeHook):
+    """
+    One-time migration of an existing snapshot table to the current layout.
+    
+    Run once with --upgrade (not part of the daily crawl). Adds the
+    brief_content_hash column and sets the clustering key; both statements are
+    idempotent, and new tables get both from the CREATE statement in Step 6.
+    
+    Note: setting a clustering key turns on Snowflake's automatic clustering,
+    which reclusters micro-partitions in the background and is billed as
+    serverless compute.
+    
+    Args:
+        hook: Open SnowflakeHook
+    """
+    table = f"{SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}"
+    logger.info(f"Upgrading {table}: brief_content_hash column, "
+                f"CLUSTER BY ({', '.join(SNAPSHOT_CLUSTER_BY)})")
+    hook.query_without_result(f"""
+    ALTER TABLE IF EXISTS {table}
+    ADD COLUMN IF NOT EXISTS brief_content_hash STRING
+    """)
+    hook.query_without_result(f"""
+    ALTER TABLE IF EXISTS {table}
+    CLUSTER BY ({', '.join(SNAPSHOT_CLUSTER_BY)})
+    """)
+
+
+def get_previous_day_brief_data(hook: SnowflakeHook) -> Dict[str, Dict[str, Any]]:
     """
-    from datetime import timedelta
+    Fetch the previous day's brief data from Snowflake.
+    
+    Args:
+        hook: Open SnowflakeHook to run the lookup on
     
+    Returns:
+        Dictionary mapping row_id to {brief, brief_content, brief_images_description,
+        brief_summary, brief_content_hash}
+    """
     try:
-        with SnowflakeHook(
-            database=SNOWFLAKE_DATABASE,
-            schema=SNOWFLAKE_SCHEMA,
-            create_local_spark=False
-        ) as hook:
-            # Get the most recent date before today
-            query = f"""
-            SELECT 
-                row_id,
-                brief,
-                brief_content,
-                brief_images_description,
-                brief_summary
+        # Get the most recent date before today
+        query = f"""
+        SELECT 
+            row_id,
+            brief,
+            brief_content,
+            brief_images_description,
+            brief_summary,
+            brief_content_hash
+        FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
+        WHERE TO_DATE(fetched_at) = (
+            SELECT MAX(TO_DATE(fetched_at)) 
             FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
-            WHERE DATE(fetched_at) = (
-                SELECT MAX(DATE(fetched_at)) 
-                FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
-                WHERE DATE(fetched_at) < CURRENT_DATE
-            )
-            """
-            
-            result = hook.query_snowflake(query, method='pandas')
-            
-            if result.empty:
-                logger.info("   No previous day's data found in Snowflake")
-                return {}
-            
-            # Build lookup dictionary
-            prev_data = {}
-            for _, row in result.iterrows():
-                row_id = row.get('row_id') or row.get('ROW_ID')
-                if row_id:
-                    prev_data[row_id] = {
-                        'brief': row.get('brief') or row.get('BRIEF'),
-                        'brief_content': row.get('brief_content') or row.get('BRIEF_CONTENT'),
-                        'brief_images_description': row.get('brief_images_description') or row.get('BRIEF_IMAGES_DESCRIPTION'),
-                        'brief_summary': row.get('brief_summary') or row.get('BRIEF_SUMMARY'),
-                    }
-            
-            logger.info(f"   Loaded {len(prev_data)} rows from previous day")
-            return prev_data
-            
+            WHERE TO_DATE(fetched_at) < CURRENT_DATE
+        )
+        """
+        
+        result = hook.query_snowflake(query, method='pandas')
+        
+        if result.empty:
+            logger.info("   No previous day's data found in Snowflake")
+            return {}
+        
+        # Build lookup dictionary (columns come back lowercased from the hook;
+        # nulls become None so callers can rely on truthiness)
+        result.columns = result.columns.str.lower()
+        result = result[result['row_id'].notna() & (result['row_id'] != '')]
+        result = result.drop_duplicates('row_id', keep='last').set_index('row_id')
+        result = result.astype(object).where(result.notna(), None)
+        prev_data = result.to_dict('index')
+        
+        logger.info(f"   Loaded {len(prev_data)} rows from previous day")
+        return prev_data
+        
     except Exception as e:
         logger.warning(f"   Could not fetch previous day's data: {e}")
         return {}
 
 
-def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.DataFrame:
+def run_rate_limited(fn: Callable[[str], Any], urls: List[str]) -> Dict[str, Any]:
+    """
+    Run a Google Docs call for each URL on a bounded thread pool.
+    
+    At most GDOC_MAX_INFLIGHT calls run at once and at most GDOC_MAX_QPS start
+    per second. URLs are submitted in waves of GDOC_BATCH_SIZE so a large
+    backlog never queues more than one batch against the API quota.
+    
+    Args:
+        fn: Function taking a URL
+        urls: URLs to process
+        
+    Returns:
+        Dictionary mapping URL to fn's result
+    """
+    limiter = RateLimiter(GDOC_MAX_QPS)
+    
+    def task(url: str) -> Any:
+        with limiter:
+            return fn(url)
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=GDOC_MAX_INFLIGHT) as executor:
+        for start in range(0, len(urls), GDOC_BATCH_SIZE):
+            wave = urls[start:start + GDOC_BATCH_SIZE]
+            results.update(zip(wave, executor.map(task, wave)))
+    
+    return results
+
+
+def crawl_google_docs_for_briefs(df: pd.DataFrame, hook: SnowflakeHook, limit: int = None) -> pd.DataFrame:
     """
     Crawl Google Doc links from brief columns and add content to DataFrame.
     
     Optimization: Only crawls briefs that have changed since the previous day.
     If brief URL is unchanged or previous brief_content was null, reuses cached content.
+    For the remaining URLs, a cheap text-only fetch is done first: if the text
+    hash matches the same row's previous brief_content_hash, that row's image
+    analysis and summary are reused instead of running the full crawl
+    (image download + LLM).
     
     Args:
         df: DataFrame with experiment data
+        hook: Open SnowflakeHook used to look up the previous day's briefs
         limit: Optional limit on number of docs to crawl (for testing)
         
     Returns:
@@ -198,9 +313,8 @@ def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.Data
     if not crawler.is_available():
         logger.warning("⚠️  Google Docs crawler not available - skipping brief crawl")
         logger.warning("   To enable: Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_OAUTH_CREDENTIALS_FILE")
-        df['brief_content'] = None
-        df['brief_images_description'] = None
-        df['brief_summary'] = None
+        for col in BRIEF_OUTPUT_COLUMNS:
+            df[col] = None
         return df
     
     # Find the brief column
@@ -212,29 +326,32 @@ def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.Data
     
     if not brief_col:
         logger.info("   No brief column found in data")
-        df['brief_content'] = None
-        df['brief_images_description'] = None
-        df['brief_summary'] = None
+        for col in BRIEF_OUTPUT_COLUMNS:
+            df[col] = None
         return df
     
     logger.info(f"   Found brief column: '{brief_col}'")
     
     # Fetch previous day's data for caching
     logger.info("   Checking previous day's data for unchanged briefs...")
-    prev_day_data = get_previous_day_brief_data()
+    prev_day_data = get_previous_day_brief_data(hook)
     
     # Extract Google Doc URLs from brief column
     df['_gdoc_url'] = df[brief_col].apply(extract_google_doc_url)
     
     # Determine which URLs need crawling vs can be cached
     urls_to_crawl = set()
-    cached_results: Dict[str, Dict[str, Any]] = {}  # url -> {content, images_desc, summary}
+    cached_results: Dict[str, Dict[str, Any]] = {}  # url -> {content, images_desc, summary, content_hash}
+    # url -> {content_hash: previous row} for the rows now linking to that URL,
+    # so a row whose link changed but whose document text did not keeps its own
+    # previous analysis (older rows have no stored hash: hash their brief_content)
+    prev_by_url: Dict[str, Dict[str, Dict[str, Any]]] = {}
     
     for _, row in df.iterrows():
         row_id = row.get('row_id')
         current_url = row.get('_gdoc_url')
         
-        if not current_url:
+        if pd.isna(current_url) or not current_url:
             continue
         
         # Check if we have previous data for this row
@@ -253,10 +370,14 @@ def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.Data
                     'content': prev_content,
                     'images_desc': prev_row.get('brief_images_description'),
                     'summary': prev_row.get('brief_summary'),
+                    'content_hash': prev_row.get('brief_content_hash') or content_hash(prev_content),
                 }
         else:
             # URL changed or no previous content - need to crawl
             urls_to_crawl.add(current_url)
+            prev_hash = prev_row.get('brief_content_hash') or content_hash(prev_content)
+            if prev_hash and prev_row.get('brief_summary'):
+                prev_by_url.setdefault(current_url, {})[prev_hash] = prev_row
     
     # Remove cached URLs that also need crawling (in case of conflicts)
     for url in urls_to_crawl:
@@ -267,46 +388,65 @@ def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.Data
     if limit:
         urls_to_crawl = urls_to_crawl[:limit]
     
+    # Only rows that had an analyzed brief yesterday can reuse it
+    probe_urls = [url for url in urls_to_crawl if url in prev_by_url]
+    
+    if probe_urls:
+        logger.info(f"   Fingerprinting {len(probe_urls)} changed briefs (text only)...")
+        unchanged_urls = []
+        probes = run_rate_limited(crawler.fetch_text, probe_urls)
+        for url, probe in probes.items():
+            probe_hash = None if probe.error else content_hash(probe.text_content)
+            prev_row = prev_by_url[url].get(probe_hash)
+            if prev_row:
+                cached_results[url] = {
+                    'content': probe.text_content,
+                    'images_desc': prev_row.get('brief_images_description'),
+                    'summary': prev_row.get('brief_summary'),
+                    'content_hash': probe_hash,
+                }
+                unchanged_urls.append(url)
+        
+        if unchanged_urls:
+            logger.info(f"   {len(unchanged_urls)} briefs have unchanged text - reusing previous analysis")
+            urls_to_crawl = [url for url in urls_to_crawl if url not in cached_results]
+    
     logger.info(f"   Found {len(urls_to_crawl)} URLs to crawl (new/changed)")
     logger.info(f"   Found {len(cached_results)} URLs with cached content (unchanged)")
     
     if not urls_to_crawl and not cached_results:
-        df['brief_content'] = None
-        df['brief_images_description'] = None
-        df['brief_summary'] = None
+        for col in BRIEF_OUTPUT_COLUMNS:
+            df[col] = None
         df.drop(columns=['_gdoc_url'], inplace=True)
         return df
     
     # Crawl new/changed documents
-    doc_results: Dict[str, GoogleDocContent] = {}
-    
-    for i, url in enumerate(urls_to_crawl, 1):
-        logger.info(f"\n   [{i}/{len(urls_to_crawl)}] Crawling: {url[:60]}...")
+    def crawl_one(url: str) -> GoogleDocContent:
         try:
-            result = crawler.crawl_document(
+            return crawler.crawl_document(
                 doc_url_or_id=url,
                 analyze_images=True,
                 is_experiment_doc=True
             )
-            doc_results[url] = result
-            
-            if result.error:
-                logger.warning(f"      ⚠️  {result.error}")
-            else:
-                logger.info(f"      ✅ {result.title}")
-                logger.info(f"         Text: {len(result.text_content)} chars, Images: {len(result.images)}")
-                
         except Exception as e:
-            logger.error(f"      ❌ Error: {e}")
-            doc_results[url] = GoogleDocContent(
+            logger.error(f"      ❌ Error crawling {url[:60]}: {e}")
+            return GoogleDocContent(
                 doc_id=url,
                 error=str(e)
             )
     
-    # Clean up temporary files
     if urls_to_crawl:
-        logger.info("\n🧹 Cleaning up temporary files...")
-        crawler.cleanup()
+        logger.info(f"\n   Crawling {len(urls_to_crawl)} documents "
+                    f"({GDOC_MAX_INFLIGHT} in flight, {GDOC_MAX_QPS:g} req/s)...")
+    doc_results: Dict[str, GoogleDocContent] = run_rate_limited(crawl_one, urls_to_crawl)
+    
+    for i, (url, result) in enumerate(doc_results.items(), 1):
+        logger.info(f"\n   [{i}/{len(urls_to_crawl)}] Crawled: {url[:60]}...")
+        if result.error:
+            logger.warning(f"      ⚠️  {result.error}")
+        else:
+            logger.info(f"      ✅ {result.title}")
+            logger.info(f"         Text: {len(result.text_content)} chars, Images: {len(result.images)}")
     
     # Map results back to DataFrame - check both crawled and cached results
     def get_content(url):
@@ -345,9 +485,21 @@ def crawl_google_docs_for_briefs(df: pd.DataFrame, limit: int = None) -> pd.Data
             return cached_results[url].get('summary')
         return None
     
+    def get_content_hash(url):
+        if pd.isna(url):
+            return None
+        # Check newly crawled results first
+        if url in doc_results:
+            return content_hash(doc_results[url].text_content)
+        # Then check cached results
+        if url in cached_results:
+            return cached_results[url].get('content_hash')
+        return None
+    
     df['brief_content'] = df['_gdoc_url'].apply(get_content)
     df['brief_images_description'] = df['_gdoc_url'].apply(get_images_desc)
     df['brief_summary'] = df['_gdoc_url'].apply(get_summary)
+    df['brief_content_hash'] = df['_gdoc_url'].apply(get_content_hash)
     
     # Drop temporary column
     df.drop(columns=['_gdoc_url'], inplace=True)
@@ -404,42 +556,59 @@ def fetch_specific_tables(doc_id: str, client: CodaClient, target_views: List[st
     return filtered_tables
 
 
-def fetch_table_data(doc_id: str, table_id: str, table_name: str, 
-                     client: CodaClient, limit: int = 500) -> pd.DataFrame:
+def clean_column_name(col_name: str) -> str:
+    """Clean a Coda column name for use as a Snowflake column."""
+    clean_col = col_name.lower()\
+        .replace(' ', '_')\
+        .replace('(', '')\
+        .replace(')', '')\
+        .replace('%', 'pct')\
+        .replace('~', '')\
+        .replace('/', '_')\
+        .replace('-', '_')\
+        .replace('.', '_')\
+        .strip('_')
+    
+    # Prefix with 'col_' if starts with a number
+    if clean_col and clean_col[0].isdigit():
+        clean_col = f"col_{clean_col}"
+    
+    return clean_col
+
+
+def iter_table_records(doc_id: str, table_id: str, table_name: str,
+                       client: CodaClient, limit: int = 500) -> Iterator[Dict[str, Any]]:
     """
-    Fetch all data from a single table/view.
+    Yield flat records for a table/view, following Coda's nextPageToken.
+    
+    Only one page of API rows is held at a time.
     
     Args:
         doc_id: Document ID
         table_id: Table ID
-        table_name: Table name (for logging)
+        table_name: Table name (stored on each record)
         client: CodaClient instance
         limit: Maximum rows to fetch
         
-    Returns:
-        DataFrame with table data
+    Yields:
+        One flat record per row
     """
-    logger.info(f"\n📥 Fetching data from: {table_name}")
+    fetched_at = datetime.now().date().isoformat()
+    page_token = None
+    remaining = limit
     
-    try:
+    while remaining > 0:
         rows_response = client.get_table_rows(
             doc_id=doc_id,
             table_id=table_id,
-            limit=limit,
+            limit=remaining,
             use_column_names=True,
-            value_format='simple'
+            value_format='simple',
+            page_token=page_token
         )
         
         items = rows_response.get('items', [])
-        logger.info(f"   Retrieved {len(items)} rows")
-        
-        if not items:
-            logger.warning(f"   ⚠️  No rows found in {table_name}")
-            return pd.DataFrame()
-        
-        # Convert to flat records
-        records = []
-        for row in items:
+        for row in items[:remaining]:
             record = {
                 'view_name': table_name,
                 'view_id': table_id,
@@ -448,33 +617,46 @@ def fetch_table_data(doc_id: str, table_id: str, table_name: str,
                 'row_index': row.get('index', 0),
                 'created_at': row.get('createdAt', ''),
                 'updated_at': row.get('updatedAt', ''),
-                'fetched_at': datetime.now().date().isoformat(),
+                'fetched_at': fetched_at,
             }
             
             # Add all column values
-            values = row.get('values', {})
-            for col_name, col_value in values.items():
-                # Clean column names for Snowflake
-                clean_col = col_name.lower()\
-                    .replace(' ', '_')\
-                    .replace('(', '')\
-                    .replace(')', '')\
-                    .replace('%', 'pct')\
-                    .replace('~', '')\
-                    .replace('/', '_')\
-                    .replace('-', '_')\
-                    .replace('.', '_')\
-                    .strip('_')
-                
-                # Prefix with 'col_' if starts with a number
-                if clean_col and clean_col[0].isdigit():
-                    clean_col = f"col_{clean_col}"
-                
-                record[clean_col] = col_value
+            for col_name, col_value in row.get('values', {}).items():
+                record[clean_column_name(col_name)] = col_value
             
-            records.append(record)
+            yield record
+        
+        remaining -= len(items)
+        page_token = rows_response.get('nextPageToken')
+        if not items or not page_token:
+            break
+
+
+def fetch_table_data(doc_id: str, table_id: str, table_name: str, 
+                     client: CodaClient, limit: int = 500) -> pd.DataFrame:
+    """
+    Fetch all data from a single table/view.
+    
+    Args:
+        doc_id: Document ID
+        table_id: Table ID
+        table_name: Table name (for logging)
+        client: CodaClient instance
+        limit: Maximum rows to fetch
+        
+    Returns:
+        DataFrame with table data
+    """
+    logger.info(f"\n📥 Fetching data from: {table_name}")
+    
+    try:
+        df = pd.DataFrame(iter_table_records(doc_id, table_id, table_name, client, limit))
+        logger.info(f"   Retrieved {len(df)} rows")
+        
+        if df.empty:
+            logger.warning(f"   ⚠️  No rows found in {table_name}")
+            return pd.DataFrame()
         
-        df = pd.DataFrame(records)
         logger.info(f"   ✅ Created DataFrame: {len(df)} rows × {len(df.columns)} columns")
         
         return df
@@ -503,27 +685,21 @@ def combine_dataframes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
     logger.info("\n📊 Combining all views into unified schema...")
     
     # Collect all unique columns across all DataFrames
-    all_columns: Set[str] = set()
-    for df in dfs:
-        all_columns.update(df.columns)
+    all_columns: Set[str] = set().union(*(df.columns for df in dfs))
+    shared_columns: Set[str] = set.intersection(*(set(df.columns) for df in dfs))
+    logger.info(f"   Total unique columns across all views: {len(all_columns)}")
     
-    all_columns_sorted = sorted(list(all_columns))
-    logger.info(f"   Total unique columns across all views: {len(all_columns_sorted)}")
-    
-    # Ensure each DataFrame has all columns (fill missing with None)
-    normalized_dfs = []
+    # Columns missing from some views are filled with nulls by concat; keep them
+    # as object dtype so values are not upcast (e.g. int -> float) before the
+    # string conversion below
     for df in dfs:
-        # Add missing columns with None values
-        for col in all_columns_sorted:
-            if col not in df.columns:
-                df[col] = None
-        
-        # Reorder columns to match unified schema
-        df = df[all_columns_sorted]
-        normalized_dfs.append(df)
+        for col in (all_columns - shared_columns).intersection(df.columns):
+            df[col] = df[col].astype(object)
     
-    # Concatenate all DataFrames
-    combined_df = pd.concat(normalized_dfs, ignore_index=True)
+    # Concatenate all DataFrames, aligning on the sorted union of columns
+    combined_df = pd.concat(dfs, ignore_index=True, sort=True)
+    if not combined_df.columns.is_monotonic_increasing:
+        combined_df = combined_df.sort_index(axis=1)
     
     # Convert columns with mixed types to strings to avoid Arrow conversion errors
     logger.info(f"   Converting mixed-type columns to strings...")
@@ -533,18 +709,56 @@ def combine_dataframes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
             # Convert to string, handling None values
             combined_df[col] = combined_df[col].astype(str).replace('nan', None).replace('None', None)
     
+    # Store columns as Arrow arrays: strings share one contiguous buffer instead of
+    # a Python object per cell, and write_pandas' Parquet step needs no conversion
+    combined_df = combined_df.convert_dtypes(dtype_backend='pyarrow')
+    
     logger.info(f"   ✅ Combined DataFrame: {len(combined_df)} rows × {len(combined_df.columns)} columns")
     
     return combined_df
 
 
-def crawl_experiments_and_persist():
+def verify_snapshot(hook: SnowflakeHook, today: str):
+    """
+    Read back today's row counts per view from Snowflake.
+    
+    Args:
+        hook: Open SnowflakeHook
+        today: Snapshot date (YYYY-MM-DD)
+    """
+    logger.info("\n" + "=" * 80)
+    logger.info("Step 7: Verification")
+    logger.info("=" * 80)
+    
+    verify_query = f"""
+    SELECT 
+        TO_DATE(fetched_at) as fetch_date,
+        view_name,
+        COUNT(*) as row_count
+    FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
+    WHERE TO_DATE(fetched_at) = TO_DATE('{today}')
+    GROUP BY TO_DATE(fetched_at), view_name
+    ORDER BY view_name
+    """
+    
+    result = hook.query_snowflake(verify_query, method='pandas')
+    
+    if not result.empty:
+        logger.info(f"✅ Verification successful for {today}:")
+        logger.info(f"\n   Rows per view:")
+        for _, row in result.iterrows():
+            logger.info(f"      {row['view_name']}: {row['row_count']} rows")
+    else:
+        logger.warning("⚠️  Could not verify data")
+
+
+def crawl_experiments_and_persist(verify: bool = False):
     """
     Main function to crawl focused Coda experiment views and persist to Snowflake.
     
     Daily Update Behavior:
     ----------------------
-    1. Checks for existing data from today
+    1. Creates the table if it doesn't exist
     2. Deletes today's data if it exists
     3. Inserts fresh data
     
@@ -553,6 +767,10 @@ def crawl_experiments_and_persist():
     - Re-running same day = update, not duplicate
     - Historical data preserved
     
+    Args:
+        verify: Re-read today's rows from Snowflake after the write. Off by
+            default since write_pandas already reports the rows loaded.
+    
     Returns:
         bool: True if successful, False otherwise
     """
@@ -596,21 +814,19 @@ def crawl_experiments_and_persist():
         logger.info("Step 3: Fetching data from target views")
         logger.info("=" * 80)
         
-        all_dfs = []
-        for table in tables:
-            table_id = table.get('id')
-            table_name = table.get('name')
-            
-            df = fetch_table_data(
+        def load_view(table: Dict[str, Any]) -> pd.DataFrame:
+            return fetch_table_data(
                 doc_id=doc_id,
-                table_id=table_id,
-                table_name=table_name,
+                table_id=table.get('id'),
+                table_name=table.get('name'),
                 client=client,
                 limit=FETCH_LIMIT
             )
-            
-            if not df.empty:
-                all_dfs.append(df)
+        
+        # Views are independent API reads, so fetch them concurrently
+        # (requests.Session in CodaClient is safe to share for these GETs)
+        with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+            all_dfs = [df for df in executor.map(load_view, tables) if not df.empty]
         
         if not all_dfs:
             logger.error("❌ No data fetched from any tables")
@@ -629,140 +845,86 @@ def crawl_experiments_and_persist():
         logger.info(f"   Views included: {combined_df['view_name'].nunique()}")
         
         # Show breakdown by view
+        view_counts = combined_df['view_name'].value_counts()
         logger.info(f"\n   Rows per view:")
         for view in TARGET_VIEWS:
-            count = len(combined_df[combined_df['view_name'] == view])
-            logger.info(f"      {view}: {count} rows")
-        
-        # Step 5: Crawl Google Doc briefs
-        logger.info("\n" + "=" * 80)
-        logger.info("Step 5: Crawling Google Doc briefs")
-        logger.info("=" * 80)
-        
-        combined_df = crawl_google_docs_for_briefs(combined_df)
-        
-        logger.info(f"\n📊 Final Combined Dataset (after brief crawl):")
-        logger.info(f"   Total rows: {len(combined_df)}")
-        logger.info(f"   Total columns: {len(combined_df.columns)}")
-        
-        # Step 6: Persist to Snowflake
-        logger.info("\n" + "=" * 80)
-        logger.info("Step 6: Persisting to Snowflake")
-        logger.info("=" * 80)
-        logger.info("Daily Update Strategy:")
-        logger.info("  1. Check for today's data")
-        logger.info("  2. Delete if exists (prevents duplicates)")
-        logger.info("  3. Insert fresh data")
-        logger.info("  → Result: One snapshot per day, historical data preserved")
+            logger.info(f"      {view}: {view_counts.get(view, 0)} rows")
         
+        # Steps 5-7 share one Snowflake session (previous-day lookup, write, verify)
         with SnowflakeHook(
             database=SNOWFLAKE_DATABASE,
             schema=SNOWFLAKE_SCHEMA,
             create_local_spark=False
         ) as hook:
+            # Step 5: Crawl Google Doc briefs
+            logger.info("\n" + "=" * 80)
+            logger.info("Step 5: Crawling Google Doc briefs")
+            logger.info("=" * 80)
             
-            # Check if table exists
-            check_query = f"""
-            SELECT COUNT(*) as cnt 
-            FROM information_schema.tables 
-            WHERE table_schema = '{SNOWFLAKE_SCHEMA.upper()}' 
-            AND table_name = '{SNOWFLAKE_TABLE.upper()}'
-            AND table_catalog = '{SNOWFLAKE_DATABASE.upper()}'
-            """
+            combined_df = crawl_google_docs_for_briefs(combined_df, hook)
+            # The brief columns are added as Python objects; store them as Arrow too
+            combined_df = combined_df.convert_dtypes(dtype_backend='pyarrow')
             
-            result = hook.query_snowflake(check_query, method='pandas')
-            table_exists = result.iloc[0]['cnt'] > 0
+            logger.info(f"\n📊 Final Combined Dataset (after brief crawl):")
+            logger.info(f"   Total rows: {len(combined_df)}")
+            logger.info(f"   Total columns: {len(combined_df.columns)}")
             
-            if not table_exists:
-                # Create new table
-                logger.info("📋 Table doesn't exist. Creating new table...")
-                success = hook.create_and_populate_table(
-                    df=combined_df,
-                    table_name=SNOWFLAKE_TABLE,
-                    schema=SNOWFLAKE_SCHEMA,
-                    database=SNOWFLAKE_DATABASE,
-                    method='pandas'
-                )
-                
-                if success:
-                    logger.info(f"✅ Table created successfully")
-                else:
-                    logger.error("❌ Failed to create table")
-                    return False
-                    
-            else:
-                # Table exists - delete today's data and append
-                logger.info("📋 Table exists. Checking for existing data...")
-                
-                check_today_query = f"""
-                SELECT COUNT(*) as cnt
-                FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
-                WHERE DATE(fetched_at) = '{today}'
-                """
-                
-                result = hook.query_snowflake(check_today_query, method='pandas')
-                today_count = result.iloc[0]['cnt']
-                
-                if today_count > 0:
-                    logger.info(f"   Found {today_count} existing rows for {today}")
-                    logger.info(f"   🗑️  Deleting existing data for {today}...")
-                    
-                    delete_query = f"""
-                    DELETE FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
-                    WHERE DATE(fetched_at) = '{today}'
-                    """
-                    
-                    hook.query_without_result(delete_query)
-                    logger.info(f"   ✅ Deleted {today_count} rows")
-                else:
-                    logger.info(f"   No existing data for {today}")
-                
-                # Append new data
-                logger.info(f"   📝 Appending {len(combined_df)} new rows...")
-                success = hook.write_to_snowflake(
-                    df=combined_df,
-                    table_name=SNOWFLAKE_TABLE,
-                    mode='append',
-                    method='pandas'
-                )
-                
-                if success:
-                    logger.info(f"✅ Data appended successfully")
-                else:
-                    logger.error("❌ Failed to append data")
-                    return False
-        
-        # Step 7: Verify
-        logger.info("\n" + "=" * 80)
-        logger.info("Step 7: Verification")
-        logger.info("=" * 80)
-        
-        with SnowflakeHook(
-            database=SNOWFLAKE_DATABASE,
-            schema=SNOWFLAKE_SCHEMA,
-            create_local_spark=False
-        ) as hook:
-            verify_query = f"""
-            SELECT 
-                DATE(fetched_at) as fetch_date,
-                view_name,
-                COUNT(*) as row_count
-            FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
-            WHERE DATE(fetched_at) = '{today}'
-            GROUP BY DATE(fetched_at), view_name
-            ORDER BY view_name
+            # Step 6: Persist to Snowflake
+            logger.info("\n" + "=" * 80)
+            logger.info("Step 6: Persisting to Snowflake")
+            logger.info("=" * 80)
+            logger.info("Daily Update Strategy:")
+            logger.info("  1. Create table if it doesn't exist")
+            logger.info("  2. Delete today's data (prevents duplicates)")
+            logger.info("  3. Insert fresh data")
+            logger.info("  → Result: One snapshot per day, historical data preserved")
+            
+            # Create the table on first run (no-op when it already exists), then
+            # replace today's snapshot: DELETE today's rows and append fresh data
+            create_query, upload_df = hook.infer_create_table(
+                df=combined_df,
+                table_name=SNOWFLAKE_TABLE,
+                schema=SNOWFLAKE_SCHEMA,
+                database=SNOWFLAKE_DATABASE,
+                if_not_exists=True,
+                cluster_by=SNAPSHOT_CLUSTER_BY
+            )
+            hook.query_without_result(create_query)
+            
+            delete_query = f"""
+            DELETE FROM {SNOWFLAKE_DATABASE}.{SNOWFLAKE_SCHEMA}.{SNOWFLAKE_TABLE}
+            WHERE TO_DATE(fetched_at) = TO_DATE('{today}')
             """
             
-            result = hook.query_snowflake(verify_query, method='pandas')
+            deleted_count = hook.query_without_result(delete_query)
+            if deleted_count:
+                logger.info(f"   🗑️  Deleted {deleted_count} existing rows for {today}")
+            else:
+                logger.info(f"   No existing data for {today}")
             
-            if not result.empty:
-                logger.info(f"✅ Verification successful for {today}:")
+            # Append new data
+            logger.info(f"   📝 Appending {len(upload_df)} new rows...")
+            success = hook.write_to_snowflake(
+                df=upload_df,
+                table_name=SNOWFLAKE_TABLE,
+                mode='append',
+                method='pandas',
+                **WRITE_PANDAS_OPTIONS
+            )
+            
+            if success:
+                logger.info(f"✅ Appended {hook.last_write_num_rows} rows for {today}")
                 logger.info(f"\n   Rows per view:")
-                for _, row in result.iterrows():
-                    logger.info(f"      {row['view_name']}: {row['row_count']} rows")
+                for view, count in upload_df['view_name'].value_counts().sort_index().items():
+                    logger.info(f"      {view}: {count} rows")
             else:
-                logger.warning("⚠️  Could not verify data")
-        
+                logger.error("❌ Failed to append data")
+                return False
+            
+            # Step 7: Verify (optional - re-scans today's rows in Snowflake)
+            if verify:
+                verify_snapshot(hook, today)
+    
         # Success summary
         logger.info("\n" + "=" * 80)
         logger.info("✅ CRAWL COMPLETED SUCCESSFULLY")
@@ -789,8 +951,26 @@ def crawl_experiments_and_persist():
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description='Crawl focused Coda experiment views into Snowflake')
+    parser.add_argument('--verify', action='store_true',
+                        help="Re-query today's row counts per view from Snowflake after the write")
+    parser.add_argument('--upgrade', action='store_true',
+                        help="One-time migration: add brief_content_hash and the clustering key "
+                             "to an existing snapshot table, then exit")
+    args = parser.parse_args()
+    
     try:
-        success = crawl_experiments_and_persist()
+        if args.upgrade:
+            with SnowflakeHook(
+                database=SNOWFLAKE_DATABASE,
+                schema=SNOWFLAKE_SCHEMA,
+                create_local_spark=False
+            ) as hook:
+                upgrade_snapshot_table(hook)
+            logger.info("✅ Snapshot table upgraded")
+            sys.exit(0)
+        
+        success = crawl_experiments_and_persist(verify=args.verify)
         
         if success:
             logger.info("\n🎉 All done!")
@@ -1,6 +1,9 @@
 -- Unified Curie experiment results query
--- Returns unpivoted format for ALL experiments (single or multiple treatments)
+-- Returns unpivoted format for ALL experiments (single or multiple treatments),
+-- for a batch of analyses at once (rows tagged with analysis_id)
 -- This query keeps data in its natural format without pivoting
+-- The analysis_id IN list is filled with one bind placeholder per analysis (pyformat),
+-- so literal percent signs are doubled
 
 WITH latest_results AS (
     -- Get all results and identify the latest dimension_value for each metric/dimension combination
@@ -19,6 +22,7 @@ WITH latest_results AS (
         -- Rank to get latest result for each metric/dimension/base_dimension_value combination
         ROW_NUMBER() OVER (
             PARTITION BY 
+                dear.analysis_id,
                 dear.metric_name,
                 dear.dimension_name,
                 CASE 
@@ -34,7 +38,7 @@ WITH latest_results AS (
         proddb.public.dimension_experiment_analysis_results dear
         LEFT JOIN CONFIGURATOR_PROD.PUBLIC.TALLEYRAND_METRICS tm ON dear.metric_name = tm.name
     WHERE
-        dear.analysis_id = '{analysis_id}'
+        dear.analysis_id IN ({analysis_ids})
         AND dear.metric_name IS NOT NULL
 )
 
@@ -96,6 +100,7 @@ WHERE
     rn = 1  -- Only use latest result for each metric/dimension/base_dimension_value
     AND metric_value IS NOT NULL  -- Ensure we have actual values
 ORDER BY 
+    analysis_id,
     metric_name,
     CASE WHEN dimension_cut_name = 'overall' THEN 0 ELSE 1 END,
     dimension_cut_name,
@@ -107,7 +112,7 @@ ORDER BY
     CASE 
         WHEN LOWER(variant_name) = 'control' THEN 0 
         WHEN LOWER(variant_name) = 'treatment' THEN 1
-        WHEN LOWER(variant_name) LIKE 'treatment_%' THEN 
+        WHEN LOWER(variant_name) LIKE 'treatment_%%' THEN 
             CASE 
                 WHEN REGEXP_SUBSTR(variant_name, '[0-9]+$') IS NOT NULL 
                 THEN 1 + CAST(REGEXP_SUBSTR(variant_name, '[0-9]+$') AS INT)
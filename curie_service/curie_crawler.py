@@ -11,8 +11,10 @@ historical data in nux_curie_result_daily (accumulates over daily runs).
 
 import re
 import json
+import math
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple, Iterator
 from pathlib import Path
 import pandas as pd
 
@@ -20,8 +22,124 @@ import pandas as pd
 from utils.snowflake_connection import SnowflakeHook
 from utils.logger import get_logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = get_logger(__name__)
 
+# Curie link formats: ...?analysisId=<id> and .../analysis/<id>
+_ANALYSIS_ID_RE = re.compile(r'analysisId=([a-f0-9\-]+)', re.IGNORECASE)
+_ANALYSIS_PATH_RE = re.compile(r'/analysis/([a-f0-9\-]+)')
+# Plausible analysis_id (UUID-like); anything else would only produce an empty query
+_ANALYSIS_ID_VALID_RE = re.compile(r'[a-f0-9\-]{8,64}', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def _parse_curie_link(curie_link: str) -> Optional[str]:
+    """Extract analysis_id from a Curie link (cached; see CurieCrawler.parse_curie_link)."""
+    if not curie_link:
+        return None
+    
+    # Try to extract analysisId parameter
+    match = _ANALYSIS_ID_RE.search(curie_link)
+    if match:
+        return match.group(1)
+    
+    # Try alternative format
+    match = _ANALYSIS_PATH_RE.search(curie_link)
+    if match:
+        return match.group(1)
+    
+    logger.warning("Could not parse analysis_id from: %s", curie_link)
+    return None
+
+
+def _bind_list(values: List[str], prefix: str = 'aid') -> Tuple[str, Dict[str, str]]:
+    """
+    Build an IN-list of pyformat placeholders and the matching bind parameters.
+    
+    The connector quotes and substitutes pyformat parameters client-side, so this
+    keeps values from being spliced into the SQL unescaped; Snowflake still
+    receives the literal values (no server-side plan reuse).
+    
+    Example: ['a', 'b'] -> ("%(aid_0)s, %(aid_1)s", {'aid_0': 'a', 'aid_1': 'b'})
+    """
+    params = {f"{prefix}_{i}": value for i, value in enumerate(values)}
+    return ", ".join(f"%({name})s" for name in params), params
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    """Convert a result value to float; None for missing, NaN or unparsable values."""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return None
+    return None if math.isnan(number) else number
+
+
+# (metric_name, dimension_cut_name, variant_name)
+MetricKey = Tuple[str, str, str]
+
+
+class MetricHistory(NamedTuple):
+    """Previous days' trend data for one metric key, aggregated in Snowflake."""
+    values: List[Dict[str, Any]]  # daily {date, impact, p_value, stat_sig}, oldest first
+    first_impact: Optional[float]  # first non-null impact
+    last_impact: Optional[float]  # last non-null impact
+    impact_count: int  # number of non-null impacts
+
+
+_NO_HISTORY = MetricHistory([], None, None, 0)
+
+# Bulk-load options for write_pandas, which already stages the frame as Parquet and
+# loads it with PUT + COPY INTO: snappy-compressed files, uploaded 8 at a time
+WRITE_PANDAS_OPTIONS = {'compression': 'snappy', 'parallel': 8, 'use_logical_type': True}
+
+# Unified Curie results query (read once at import; shared by all crawlers)
+SQL_TEMPLATE = (Path(__file__).parent / 'combined_curie_results_unified.sql').read_text()
+
+# Analyses fetched and written per batch: bounds peak memory to one batch of
+# results while keeping the number of Curie queries small
+CURIE_BATCH_SIZE = 50
+
+# Curie result columns read when building each row's trend history
+TREND_INPUT_COLUMNS = [
+    'analysis_id',
+    'metric_name',
+    'dimension_cut_name',
+    'variant_name',
+    'metric_impact_relative',
+    'p_value',
+    'stat_sig',
+]
+
+# Coda metadata added to every result row, as Coda column -> result column (plus
+# fetched_at). Constant per experiment, so stored as categoricals: one category per
+# experiment instead of a string per row
+METADATA_COLUMNS = {
+    'row_id': 'coda_row_id',
+    'browser_link': 'coda_browser_link',
+    'row_name': 'project_name',
+    'project_status': 'project_status',
+    'curie_ios': 'curie_ios_link',
+    'dv': 'dv_link',
+}
+
+# Coda columns read per experiment, with the value used when a column is absent
+EXPERIMENT_COLUMNS = {
+    'row_name': 'Unknown',
+    'curie_ios': '',
+    'row_id': '',
+    'browser_link': '',
+    'project_status': '',
+    'dv': '',
+}
+
 
 class CurieCrawler:
     """
@@ -30,9 +148,10 @@ class CurieCrawler:
     Workflow:
     1. Fetch active experiments from Snowflake (coda_experiments_daily table)
     2. Parse Curie iOS links to extract analysis_id
-    3. Query Curie results for each experiment
-    4. Combine results with Coda metadata
-    5. Persist to Snowflake with daily upsert logic
+    3. Query Curie results in batches of analyses (one query per batch)
+    4. Combine each batch's results with Coda metadata
+    5. Replace today's snapshot: today's rows are deleted before the first batch,
+       then each batch is appended as it completes; a failing batch is retried per experiment and otherwise skipped
     
     Note: This crawler should run AFTER crawl_coda.py has populated coda_experiments_daily
     """
@@ -55,11 +174,20 @@ class CurieCrawler:
         self.database = database
         self.schema = schema
         self.table_name = table_name
+        self.target_table = f"{database}.{schema}.{table_name}"
+        self.sql_template = SQL_TEMPLATE
         
-        # Load SQL template
-        sql_template_path = Path(__file__).parent / 'combined_curie_results_unified.sql'
-        with open(sql_template_path, 'r') as f:
-            self.sql_template = f.read()
+        # Active experiments from the latest snapshot. The scalar MAX() subquery is
+        # answered from micro-partition metadata and lets Snowflake prune the outer
+        # scan to the latest snapshot. Built once since the source table is fixed.
+        self.active_experiments_query = f"""
+        SELECT * 
+        FROM {source_table}
+        WHERE fetched_at = (SELECT MAX(fetched_at) FROM {source_table})
+        AND project_status IN ('8. In experiment', '8. Ramping')
+        AND curie_ios IS NOT NULL 
+        AND curie_ios != ''
+        """
         
         logger.info(f"✅ Initialized CurieCrawler")
         logger.info(f"   Source: {source_table}")
@@ -78,160 +206,200 @@ class CurieCrawler:
         Returns:
             analysis_id or None if not found
         """
-        if not curie_link or curie_link == '':
+        if not isinstance(curie_link, str):
             return None
-        
-        # Try to extract analysisId parameter
-        match = re.search(r'analysisId=([a-f0-9\-]+)', curie_link, re.IGNORECASE)
-        if match:
-            return match.group(1)
-        
-        # Try alternative format
-        match = re.search(r'/analysis/([a-f0-9\-]+)', curie_link)
-        if match:
-            return match.group(1)
-        
-        logger.warning(f"Could not parse analysis_id from: {curie_link}")
-        return None
+        return _parse_curie_link(curie_link)
     
-    def fetch_active_experiments(self) -> pd.DataFrame:
+    def fetch_active_experiments(self, hook: SnowflakeHook) -> pd.DataFrame:
         """
         Fetch active experiments from Snowflake (coda_experiments_daily table).
         
+        Args:
+            hook: Open SnowflakeHook
+        
         Returns:
             DataFrame with active experiments and metadata
         """
         logger.info(f"Fetching active experiments from {self.source_table}...")
         
-        # Query to get active experiments from Snowflake
-        query = f"""
-        SELECT * 
-        FROM {self.source_table}
-        WHERE fetched_at = (SELECT MAX(fetched_at) FROM {self.source_table})
-        AND project_status IN ('8. In experiment', '8. Ramping')
-        AND curie_ios IS NOT NULL 
-        AND curie_ios != ''
-        """
-        
         # Fetch from Snowflake
-        with SnowflakeHook(database=self.database, schema=self.schema) as hook:
-            df_active = hook.query_snowflake(query, method='pandas')
+        df_active = hook.query_snowflake(self.active_experiments_query, method='pandas')
         
         logger.info(f"✅ Found {len(df_active)} active experiments with Curie links")
         
         return df_active
     
-    def fetch_curie_results(self, analysis_id: str) -> pd.DataFrame:
+    def fetch_curie_results(self, hook: SnowflakeHook, analysis_id: str) -> pd.DataFrame:
         """
         Fetch Curie experiment results for a specific analysis_id.
         
         Args:
+            hook: Open SnowflakeHook
             analysis_id: Curie analysis ID
             
         Returns:
             DataFrame with experiment results
         """
-        logger.info(f"Fetching Curie results for analysis_id: {analysis_id}")
+        return self.fetch_curie_results_batch(hook, [analysis_id])
+    
+    def fetch_curie_results_batch(self, hook: SnowflakeHook, analysis_ids: List[str]) -> pd.DataFrame:
+        """
+        Fetch Curie experiment results for several analyses in one query.
         
-        # Replace {analysis_id} in SQL template
-        query = self.sql_template.replace('{analysis_id}', analysis_id)
+        Args:
+            hook: Open SnowflakeHook
+            analysis_ids: Curie analysis IDs
+            
+        Returns:
+            DataFrame with experiment results for all analyses (tagged by analysis_id)
+        """
+        if not analysis_ids:
+            return pd.DataFrame()
+        
+        logger.info("Fetching Curie results for %d analyses", len(analysis_ids))
         
-        # Execute query
-        with SnowflakeHook(database=self.database, schema=self.schema) as hook:
-            results_df = hook.query_snowflake(query, method='pandas')
+        # analysis_ids are bound (escaped client-side), one placeholder each
+        id_list, params = _bind_list(analysis_ids)
+        query = self.sql_template.replace('{analysis_ids}', id_list)
+        results_df = hook.query_snowflake(query, method='arrow', params=params)
         
-        logger.info(f"✅ Fetched {len(results_df)} result rows")
+        logger.info("✅ Fetched %d result rows", len(results_df))
         
         return results_df
     
-    def fetch_metric_history(self, analysis_id: str) -> pd.DataFrame:
+    def fetch_metric_history(self, hook: SnowflakeHook,
+                             analysis_ids: List[str]) -> Dict[str, Dict[MetricKey, MetricHistory]]:
         """
-        Fetch all historical data for an analysis from our daily table.
+        Fetch historical trend data for a set of analyses from our daily table.
+        
+        One query covers every analysis (instead of one round-trip per
+        experiment), and Snowflake aggregates each metric series server-side:
+        the daily values array and the first/last non-null impacts. The trend
+        delta and direction are not computed here: they depend on today's
+        impact, which comes from the Curie results query rather than our daily
+        table, so compute_trend_history folds today's value in per row.
+        The result is read batch by batch and indexed as it streams in, so the
+        full result set is never materialized as one DataFrame.
         
         Args:
-            analysis_id: Curie analysis ID
+            hook: Open SnowflakeHook
+            analysis_ids: Curie analysis IDs
             
         Returns:
-            DataFrame with historical metric data (all previous days)
+            Dictionary mapping analysis_id to {(metric_name, dimension_cut_name,
+            variant_name): MetricHistory} covering all previous days. Analyses
+            without history are omitted.
         """
+        if not analysis_ids:
+            return {}
+        
+        id_list, params = _bind_list(analysis_ids)
+        # One row per (analysis, metric, dimension cut, variant): the daily values
+        # as a JSON array ordered by date, plus the first/last non-null impacts
+        # (ARRAY_AGG skips NULLs) used for the trend direction
         query = f"""
+        WITH history AS (
+            SELECT 
+                analysis_id,
+                metric_name,
+                dimension_cut_name,
+                variant_name,
+                DATE(fetched_at) as fetch_date,
+                TRY_CAST(metric_impact_relative AS FLOAT) as impact,
+                TRY_CAST(TO_VARCHAR(p_value) AS FLOAT) as p_value,
+                stat_sig
+            FROM {self.target_table}
+            WHERE analysis_id IN ({id_list})
+              AND LOWER(variant_name) != 'control'
+        ),
+        aggregated AS (
+            SELECT 
+                analysis_id,
+                metric_name,
+                dimension_cut_name,
+                variant_name,
+                ARRAY_AGG(OBJECT_CONSTRUCT_KEEP_NULL(
+                    'date', TO_VARCHAR(fetch_date),
+                    'impact', impact,
+                    'p_value', p_value,
+                    'stat_sig', stat_sig
+                )) WITHIN GROUP (ORDER BY fetch_date) as history_values,
+                ARRAY_AGG(impact) WITHIN GROUP (ORDER BY fetch_date) as impacts
+            FROM history
+            GROUP BY analysis_id, metric_name, dimension_cut_name, variant_name
+        )
         SELECT 
+            analysis_id,
             metric_name,
             dimension_cut_name,
             variant_name,
-            DATE(fetched_at) as fetch_date,
-            TRY_CAST(metric_impact_relative AS FLOAT) as impact,
-            p_value,
-            stat_sig
-        FROM {self.database}.{self.schema}.{self.table_name}
-        WHERE analysis_id = '{analysis_id}'
-          AND LOWER(variant_name) != 'control'
-        ORDER BY metric_name, dimension_cut_name, variant_name, fetch_date ASC
+            TO_JSON(history_values) as history_values,
+            impacts[0]::FLOAT as first_impact,
+            impacts[ARRAY_SIZE(impacts) - 1]::FLOAT as last_impact,
+            ARRAY_SIZE(impacts) as impact_count
+        FROM aggregated
         """
         
+        history_by_id: Dict[str, Dict[MetricKey, MetricHistory]] = {}
+        loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+        
         try:
-            with SnowflakeHook(database=self.database, schema=self.schema) as hook:
-                history_df = hook.query_snowflake(query, method='pandas')
-            return history_df
+            for batch in hook.query_snowflake_batches(query, params=params):
+                for h in batch.itertuples(index=False):
+                    key = (h.metric_name, h.dimension_cut_name, h.variant_name)
+                    history_by_id.setdefault(h.analysis_id, {})[key] = MetricHistory(
+                        values=loads(h.history_values),
+                        first_impact=None if pd.isna(h.first_impact) else float(h.first_impact),
+                        last_impact=None if pd.isna(h.last_impact) else float(h.last_impact),
+                        impact_count=int(h.impact_count)
+                    )
         except Exception as e:
             logger.warning(f"Could not fetch history (table may not exist yet): {e}")
-            return pd.DataFrame()
+            return {}
+        
+        return history_by_id
     
-    def compute_trend_history(self, row: pd.Series, history_df: pd.DataFrame, today: str) -> Optional[str]:
+    def compute_trend_history(self, row: Tuple,
+                              history_by_key: Dict[MetricKey, MetricHistory],
+                              today: str, is_control: Optional[bool] = None) -> Optional[str]:
         """
         Compute trend history for a single metric row (treatment only).
         
         Args:
-            row: Current metric row
-            history_df: Historical data for this analysis
+            row: Current metric row (namedtuple with TREND_INPUT_COLUMNS)
+            history_by_key: Historical values for this analysis, from fetch_metric_history
             today: Today's date string
+            is_control: Whether the row is the control variant (derived from
+                variant_name when not given)
             
         Returns:
             JSON string with trend history, or None for control rows
         """
-        variant = row.get('variant_name', '')
+        variant = row.variant_name
         
         # Skip control rows
-        if variant.lower() == 'control':
+        if is_control is None:
+            is_control = variant.lower() == 'control'
+        if is_control:
             return None
             
-        metric_name = row.get('metric_name')
-        dimension_cut = row.get('dimension_cut_name', 'overall')
-        current_impact = row.get('metric_impact_relative')
-        current_p_value = row.get('p_value')
-        current_stat_sig = row.get('stat_sig')
-        
-        # Filter history for this specific metric/dimension/variant
-        if not history_df.empty:
-            mask = (
-                (history_df['metric_name'] == metric_name) &
-                (history_df['dimension_cut_name'] == dimension_cut) &
-                (history_df['variant_name'] == variant)
-            )
-            metric_history = history_df[mask].copy()
-        else:
-            metric_history = pd.DataFrame()
-        
-        # Build values array from history
-        values = []
-        for _, hist_row in metric_history.iterrows():
-            values.append({
-                'date': str(hist_row['fetch_date']),
-                'impact': float(hist_row['impact']) if hist_row['impact'] is not None else None,
-                'p_value': float(hist_row['p_value']) if hist_row['p_value'] is not None else None,
-                'stat_sig': hist_row['stat_sig']
-            })
-        
-        # Add today's value
-        try:
-            current_impact_float = float(current_impact) if current_impact is not None else None
-        except (ValueError, TypeError):
-            current_impact_float = None
-            
-        try:
-            current_p_float = float(current_p_value) if current_p_value is not None else None
-        except (ValueError, TypeError):
-            current_p_float = None
+        metric_name = row.metric_name
+        dimension_cut = row.dimension_cut_name
+        current_impact = row.metric_impact_relative
+        current_p_value = row.p_value
+        current_stat_sig = row.stat_sig
+        
+        # Values array from history for this specific metric/dimension/variant
+        # (copied, since today's value is appended below)
+        history = history_by_key.get((metric_name, dimension_cut, variant), _NO_HISTORY)
+        values = list(history.values)
+        
+        # Add today's value (missing and NaN values become null: json.dumps would
+        # otherwise write a bare NaN, which is not valid JSON)
+        current_impact_float = _float_or_none(current_impact)
+        current_p_float = _float_or_none(current_p_value)
+        if current_stat_sig is not None and pd.isna(current_stat_sig):
+            current_stat_sig = None
             
         values.append({
             'date': today,
@@ -240,22 +408,24 @@ class CurieCrawler:
             'stat_sig': current_stat_sig
         })
         
-        # Compute trend direction
+        # Compute trend direction from the first and last non-null impacts
+        # (today's impact, when present, is the last one)
+        first_impact, last_impact, impact_count = history.first_impact, history.last_impact, history.impact_count
+        if current_impact_float is not None:
+            first_impact = current_impact_float if impact_count == 0 else first_impact
+            last_impact = current_impact_float
+            impact_count += 1
+        
         trend_direction = 'new'
-        if len(values) >= 2:
-            # Get first and last non-null impacts
-            impacts = [v['impact'] for v in values if v['impact'] is not None]
-            if len(impacts) >= 2:
-                first_impact = impacts[0]
-                last_impact = impacts[-1]
-                delta = last_impact - first_impact
-                
-                if abs(delta) < 0.001:  # Threshold for "stable"
-                    trend_direction = 'stable'
-                elif delta > 0:
-                    trend_direction = 'improving'
-                else:
-                    trend_direction = 'declining'
+        if impact_count >= 2:
+            delta = last_impact - first_impact
+            
+            if abs(delta) < 0.001:  # Threshold for "stable"
+                trend_direction = 'stable'
+            elif delta > 0:
+                trend_direction = 'improving'
+            else:
+                trend_direction = 'declining'
         
         # First seen date
         first_seen = values[0]['date'] if values else today
@@ -267,99 +437,48 @@ class CurieCrawler:
             'trend_direction': trend_direction
         }
         
-        return json.dumps(trend_obj)
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(trend_obj).decode()
+        return json.dumps(trend_obj, separators=(',', ':'))
     
-    def crawl_all_experiments(self) -> pd.DataFrame:
+    def crawl_all_experiments(self, hook: Optional[SnowflakeHook] = None,
+                              today: Optional[str] = None) -> pd.DataFrame:
         """
-        Crawl results for all active experiments.
+        Crawl results for all active experiments (nothing is written).
+        
+        Args:
+            hook: Open SnowflakeHook (a connection is opened for the call if None)
+            today: Snapshot date (fetched_at); defaults to today
         
         Returns:
             Combined DataFrame with all results and metadata
         """
-        today = datetime.now().date().isoformat()
-        
-        logger.info("=" * 80)
-        logger.info("Starting Curie Results Crawl")
-        logger.info("=" * 80)
-        
-        # Step 1: Get active experiments from Coda
-        experiments_df = self.fetch_active_experiments()
-        
-        if experiments_df.empty:
-            logger.warning("No active experiments found")
-            return pd.DataFrame()
-        
-        # Step 2: Process each experiment
-        all_results = []
-        
-        for idx, exp_row in experiments_df.iterrows():
-            project_name = exp_row.get('row_name', 'Unknown')
-            curie_link = exp_row.get('curie_ios', '')
-            
-            logger.info(f"\n--- Processing: {project_name} ---")
-            
-            # Parse analysis_id
-            analysis_id = self.parse_curie_link(curie_link)
-            
-            if not analysis_id:
-                logger.warning(f"   ⚠️  No analysis_id found, skipping")
-                continue
-            
-            logger.info(f"   Analysis ID: {analysis_id}")
-            
-            try:
-                # Fetch Curie results
-                results_df = self.fetch_curie_results(analysis_id)
-                
-                if results_df.empty:
-                    logger.warning(f"   ⚠️  No results found")
-                    continue
-                
-                # Fetch historical data for trend computation (treatment rows only)
-                history_df = self.fetch_metric_history(analysis_id)
-                logger.info(f"   📊 Historical data: {len(history_df)} rows from previous days")
-                
-                # Add metadata from Coda
-                results_df['coda_row_id'] = exp_row.get('row_id', '')
-                results_df['coda_browser_link'] = exp_row.get('browser_link', '')
-                results_df['project_name'] = project_name
-                results_df['project_status'] = exp_row.get('project_status', '')
-                results_df['curie_ios_link'] = curie_link
-                results_df['dv_link'] = exp_row.get('dv', '')
-                results_df['fetched_at'] = today
-                
-                # Compute trend history for each row (only treatment rows get trends)
-                treatment_count = (results_df['variant_name'].str.lower() != 'control').sum()
-                logger.info(f"   📈 Computing trend history for {treatment_count} treatment rows...")
-                results_df['metric_trend_history'] = results_df.apply(
-                    lambda row: self.compute_trend_history(row, history_df, today),
-                    axis=1
-                )
-                
-                all_results.append(results_df)
-                logger.info(f"   ✅ Added {len(results_df)} results")
-                
-            except Exception as e:
-                logger.error(f"   ❌ Error fetching results: {e}")
-                continue
+        if hook is None:
+            with self._open_hook() as hook:
+                return self.crawl_all_experiments(hook, today)
         
-        # Step 3: Combine all results
-        if not all_results:
+        today = today or datetime.now().date().isoformat()
+        results = list(self._iter_result_batches(hook, today))
+        if not results:
             logger.warning("No results fetched from any experiment")
             return pd.DataFrame()
         
-        combined_df = pd.concat(all_results, ignore_index=True)
+        combined_df = pd.concat(results, ignore_index=True)
         logger.info(f"\n✅ Total results collected: {len(combined_df)} rows")
-        logger.info(f"   From {len(all_results)} experiments")
+        logger.info(f"   From {combined_df['analysis_id'].nunique()} experiments")
         
         return combined_df
     
-    def save_to_snowflake(self, df: pd.DataFrame) -> bool:
+    def save_to_snowflake(self, df: pd.DataFrame, hook: Optional[SnowflakeHook] = None,
+                          today: Optional[str] = None) -> bool:
         """
-        Save results to Snowflake with daily upsert logic.
+        Save results to Snowflake with daily replace logic (today's rows are
+        deleted, then df is written).
         
         Args:
-            df: DataFrame with results to save
+            df: DataFrame with results to save (e.g. from crawl_all_experiments)
+            hook: Open SnowflakeHook (a connection is opened for the call if None)
+            today: Snapshot date whose rows are replaced; defaults to today
             
         Returns:
             True if successful
@@ -368,84 +487,281 @@ class CurieCrawler:
             logger.error("No data to save")
             return False
         
-        today = datetime.now().date().isoformat()
+        if hook is None:
+            with self._open_hook() as hook:
+                return self.save_to_snowflake(df, hook, today)
+        
+        today = today or datetime.now().date().isoformat()
+        logger.info(f"Target: {self.target_table}")
+        target_exists = self._clear_today(hook, today)
+        success = self._write_chunk(hook, df, create_target=not target_exists)
+        if success:
+            logger.info(f"✅ Saved {len(df)} rows")
+        return success
+    
+    def crawl_and_save(self, hook: SnowflakeHook, today: Optional[str] = None) -> int:
+        """
+        Crawl results for all active experiments and write them to Snowflake.
         
-        logger.info("\n" + "=" * 80)
-        logger.info("Saving to Snowflake")
+        Same result as crawl_all_experiments + save_to_snowflake, but each batch
+        of CURIE_BATCH_SIZE analyses is written as soon as it is ready, so only a
+        single batch is held in memory.
+        
+        Args:
+            hook: Open SnowflakeHook
+            today: Snapshot date (fetched_at); defaults to today
+        
+        Returns:
+            Number of rows written
+        """
+        today = today or datetime.now().date().isoformat()
+        
+        # Replace today's snapshot. Rows from an earlier run today are cleared up
+        # front, so they don't linger even if no batch is written.
+        logger.info(f"Target: {self.target_table}")
+        target_exists = self._clear_today(hook, today)
+        
+        # Write each batch as soon as it is ready. A failing write is logged and
+        # skipped so the rest of the run continues.
+        total_rows = 0
+        crawled_count = 0
+        for results_df in self._iter_result_batches(hook, today):
+            try:
+                success = self._write_chunk(hook, results_df, create_target=not target_exists)
+            except Exception as e:
+                logger.error("   ❌ Error saving results for %d analyses: %s",
+                             results_df['analysis_id'].nunique(), e)
+                continue
+            if not success:
+                logger.error("   ❌ Failed to save results for %d analyses",
+                             results_df['analysis_id'].nunique())
+                continue
+            target_exists = True
+            total_rows += len(results_df)
+            crawled_count += results_df['analysis_id'].nunique()
+        
+        if total_rows == 0:
+            logger.warning("No results fetched from any experiment")
+            return 0
+        
+        logger.info(f"\n✅ Total results saved: {total_rows} rows")
+        logger.info(f"   From {crawled_count} experiments")
+        
+        return total_rows
+    
+    def _iter_result_batches(self, hook: SnowflakeHook, today: str) -> Iterator[pd.DataFrame]:
+        """
+        Yield the results of all active experiments, one batch of
+        CURIE_BATCH_SIZE analyses at a time (empty batches are skipped).
+        
+        Args:
+            hook: Open SnowflakeHook
+            today: Snapshot date (fetched_at)
+        
+        Yields:
+            DataFrame with results, Coda metadata and trend history per batch
+        """
+        logger.info("=" * 80)
+        logger.info("Starting Curie Results Crawl")
         logger.info("=" * 80)
-        logger.info(f"Target: {self.database}.{self.schema}.{self.table_name}")
-        logger.info(f"Rows: {len(df)}")
         
-        with SnowflakeHook(
+        # Step 1: Get active experiments from Coda
+        experiments_df = self.fetch_active_experiments(hook)
+        
+        if experiments_df.empty:
+            logger.warning("No active experiments found")
+            return
+        
+        # Only the metadata columns are needed per experiment
+        experiments = experiments_df.reindex(columns=list(EXPERIMENT_COLUMNS))
+        for col, default in EXPERIMENT_COLUMNS.items():
+            if col not in experiments_df.columns:
+                experiments[col] = default
+        
+        # Step 2: Parse analysis_ids and fetch all history (treatment rows) in one query
+        # Vectorized over all links: analysisId= parameter first, then /analysis/ path
+        links = experiments['curie_ios'].astype('string')
+        experiments['analysis_id'] = links.str.extract(_ANALYSIS_ID_RE, expand=False).fillna(
+            links.str.extract(_ANALYSIS_PATH_RE, expand=False)
+        )
+        valid = experiments['analysis_id'].str.fullmatch(_ANALYSIS_ID_VALID_RE).fillna(False)
+        experiments['analysis_id'] = experiments['analysis_id'].where(valid)
+        for project_name in experiments.loc[experiments['analysis_id'].isna(), 'row_name']:
+            logger.warning("   ⚠️  %s: No analysis_id found, skipping", project_name)
+        
+        # Several Coda rows can point at the same analysis; crawl each one once
+        # (the first row supplies the Coda metadata)
+        experiments = experiments.dropna(subset=['analysis_id'])
+        duplicates = experiments['analysis_id'].duplicated(keep='first')
+        for project_name in experiments.loc[duplicates, 'row_name']:
+            logger.info("   ↩️  %s: Same analysis_id as an earlier experiment, skipping", project_name)
+        experiments = experiments[~duplicates]
+        
+        unique_ids = experiments['analysis_id'].tolist()
+        history_by_id = self.fetch_metric_history(hook, unique_ids)
+        logger.info(f"📊 Historical data found for {len(history_by_id)} of {len(unique_ids)} analyses")
+        
+        # Step 3: Crawl in batches (a failing batch is retried per experiment)
+        for start in range(0, len(experiments), CURIE_BATCH_SIZE):
+            batch = experiments.iloc[start:start + CURIE_BATCH_SIZE]
+            results_df = self._crawl_batch_isolated(hook, batch, history_by_id, today)
+            if not results_df.empty:
+                yield results_df
+    
+    def _crawl_batch_isolated(self, hook: SnowflakeHook, experiments: pd.DataFrame,
+                              history_by_id: Dict[str, Dict[MetricKey, MetricHistory]],
+                              today: str) -> pd.DataFrame:
+        """
+        Run _crawl_batch, isolating failures per experiment.
+        
+        If the batch fails, each experiment is retried on its own, so one bad
+        analysis only loses its own results (as in the per-experiment crawl).
+        
+        Args:
+            hook: Open SnowflakeHook
+            experiments: Deduped experiment rows (EXPERIMENT_COLUMNS plus analysis_id)
+            history_by_id: History by analysis_id, from fetch_metric_history
+            today: Today's date string
+            
+        Returns:
+            DataFrame with the results of every experiment that succeeded
+        """
+        try:
+            return self._crawl_batch(hook, experiments, history_by_id, today)
+        except Exception as e:
+            if len(experiments) == 1:
+                logger.error("   ❌ %s: Error fetching results: %s", experiments['row_name'].iloc[0], e)
+                return pd.DataFrame()
+            logger.warning("   ⚠️  Batch of %d analyses failed (%s); retrying one by one", len(experiments), e)
+        
+        results = [
+            self._crawl_batch_isolated(hook, experiments.iloc[[i]], history_by_id, today)
+            for i in range(len(experiments))
+        ]
+        results = [df for df in results if not df.empty]
+        return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    
+    def _crawl_batch(self, hook: SnowflakeHook, experiments: pd.DataFrame,
+                     history_by_id: Dict[str, Dict[MetricKey, MetricHistory]],
+                     today: str) -> pd.DataFrame:
+        """
+        Fetch Curie results for a batch of experiments and add metadata and trends.
+        
+        Args:
+            hook: Open SnowflakeHook
+            experiments: Deduped experiment rows (EXPERIMENT_COLUMNS plus analysis_id)
+            history_by_id: History by analysis_id, from fetch_metric_history
+            today: Today's date string
+            
+        Returns:
+            DataFrame with results, Coda metadata and trend history (empty if no results)
+        """
+        results_df = self.fetch_curie_results_batch(hook, experiments['analysis_id'].tolist())
+        
+        missing = ~experiments['analysis_id'].isin(results_df.get('analysis_id', []))
+        for project_name in experiments.loc[missing, 'row_name']:
+            logger.warning("   ⚠️  %s: No results found", project_name)
+        
+        if results_df.empty:
+            return results_df
+        
+        # Attach Coda metadata with a single merge on analysis_id
+        metadata_df = (
+            experiments[['analysis_id', *METADATA_COLUMNS]]
+            .rename(columns=METADATA_COLUMNS)
+            .assign(fetched_at=today)
+        )
+        metadata_cols = [*METADATA_COLUMNS.values(), 'fetched_at']
+        metadata_df[metadata_cols] = metadata_df[metadata_cols].astype('category')
+        results_df = results_df.merge(metadata_df, on='analysis_id', how='left')
+        
+        # Compute trend history for each row (only treatment rows get trends)
+        is_control = results_df['variant_name'].str.lower().eq('control')
+        logger.debug("📈 Computing trend history for %d treatment rows...", (~is_control).sum())
+        results_df['metric_trend_history'] = [
+            self.compute_trend_history(row, history_by_id.get(row.analysis_id, {}), today, row_is_control)
+            for row, row_is_control in zip(
+                results_df[TREND_INPUT_COLUMNS].itertuples(index=False),
+                is_control.tolist()
+            )
+        ]
+        
+        return results_df
+    
+    def _open_hook(self) -> SnowflakeHook:
+        """New SnowflakeHook for the output database/schema (use as a context manager)."""
+        return SnowflakeHook(
             database=self.database,
             schema=self.schema,
             create_local_spark=False
-        ) as hook:
-            
-            # Check if table exists
-            check_query = f"""
-            SELECT COUNT(*) as cnt 
-            FROM information_schema.tables 
-            WHERE table_schema = '{self.schema.upper()}' 
-            AND table_name = '{self.table_name.upper()}'
-            AND table_catalog = '{self.database.upper()}'
-            """
+        )
+    
+    def _target_exists(self, hook: SnowflakeHook) -> bool:
+        """Check whether the target table exists."""
+        check_query = f"""
+        SELECT COUNT(*) as cnt 
+        FROM information_schema.tables 
+        WHERE table_schema = '{self.schema.upper()}' 
+        AND table_name = '{self.table_name.upper()}'
+        AND table_catalog = '{self.database.upper()}'
+        """
+        result = hook.query_snowflake(check_query, method='pandas')
+        return result.iloc[0, 0] > 0
+    
+    def _clear_today(self, hook: SnowflakeHook, today: str) -> bool:
+        """
+        Delete today's rows from the target table, if it exists.
+        
+        Args:
+            hook: Open SnowflakeHook
+            today: Today's date string
             
-            result = hook.query_snowflake(check_query, method='pandas')
-            table_exists = result.iloc[0]['cnt'] > 0
+        Returns:
+            Whether the target table exists
+        """
+        if not self._target_exists(hook):
+            return False
+        
+        deleted_count = hook.query_without_result(
+            f"DELETE FROM {self.target_table} WHERE fetched_at = '{today}'"
+        )
+        if deleted_count:
+            logger.info("   🗑️  Deleted %d existing rows for %s", deleted_count, today)
+        return True
+    
+    def _write_chunk(self, hook: SnowflakeHook, df: pd.DataFrame,
+                     create_target: bool = False) -> bool:
+        """
+        Append one batch of results to the target table.
+        
+        Today's rows are deleted once before the first batch (see _clear_today),
+        so plain appends give a clean daily snapshot.
+        
+        Args:
+            hook: Open SnowflakeHook
+            df: Batch of results to write
+            create_target: Create the target table from df (first run only)
             
-            if not table_exists:
-                # Create table
-                logger.info("📋 Creating new table...")
-                success = hook.create_and_populate_table(
-                    df=df,
-                    table_name=self.table_name,
-                    schema=self.schema,
-                    database=self.database,
-                    method='pandas'
-                )
-                
-                if success:
-                    logger.info(f"✅ Table created with {len(df)} rows")
-                return success
-            else:
-                # Delete today's data if exists
-                logger.info("📋 Table exists. Checking for today's data...")
-                
-                check_today_query = f"""
-                SELECT COUNT(*) as cnt
-                FROM {self.database}.{self.schema}.{self.table_name}
-                WHERE fetched_at = '{today}'
-                """
-                
-                result = hook.query_snowflake(check_today_query, method='pandas')
-                today_count = result.iloc[0]['cnt']
-                
-                if today_count > 0:
-                    logger.info(f"   Found {today_count} existing rows for {today}")
-                    logger.info(f"   Deleting...")
-                    
-                    delete_query = f"""
-                    DELETE FROM {self.database}.{self.schema}.{self.table_name}
-                    WHERE fetched_at = '{today}'
-                    """
-                    
-                    hook.query_without_result(delete_query)
-                    logger.info(f"   ✅ Deleted {today_count} rows")
-                
-                # Append new data
-                logger.info(f"   Appending {len(df)} new rows...")
-                success = hook.write_to_snowflake(
-                    df=df,
-                    table_name=self.table_name,
-                    mode='append',
-                    method='pandas'
-                )
-                
-                if success:
-                    logger.info(f"✅ Data appended successfully")
-                
-                return success
+        Returns:
+            True if successful
+        """
+        if create_target:
+            logger.info("📋 Creating new table...")
+            return hook.create_and_populate_table(
+                df=df,
+                table_name=self.table_name,
+                schema=self.schema,
+                database=self.database,
+                **WRITE_PANDAS_OPTIONS
+            )
+        
+        logger.info("   Appending %d rows...", len(df))
+        return hook.write_to_snowflake(
+            df=df,
+            table_name=self.table_name,
+            mode='append',
+            **WRITE_PANDAS_OPTIONS
+        )
     
     def run(self) -> bool:
         """
@@ -454,26 +770,27 @@ class CurieCrawler:
         Returns:
             True if successful
         """
+        # One date for the whole run, so a crawl crossing midnight stays in one snapshot
+        today = datetime.now().date().isoformat()
+        
         try:
-            # Crawl all experiments
-            results_df = self.crawl_all_experiments()
+            # One connection for the whole run
+            with self._open_hook() as hook:
+                # Crawl all experiments (each batch is saved as it completes)
+                total_rows = self.crawl_and_save(hook, today=today)
             
-            if results_df.empty:
+            if total_rows == 0:
                 logger.warning("No results to save")
                 return False
             
-            # Save to Snowflake
-            success = self.save_to_snowflake(results_df)
-            
-            if success:
-                logger.info("\n" + "=" * 80)
-                logger.info("✅ CURIE CRAWL COMPLETED SUCCESSFULLY")
-                logger.info("=" * 80)
-                logger.info(f"Table: {self.database}.{self.schema}.{self.table_name}")
-                logger.info(f"Rows: {len(results_df)}")
-                logger.info(f"Date: {datetime.now().date().isoformat()}")
+            logger.info("\n" + "=" * 80)
+            logger.info("✅ CURIE CRAWL COMPLETED SUCCESSFULLY")
+            logger.info("=" * 80)
+            logger.info(f"Table: {self.target_table}")
+            logger.info(f"Rows: {total_rows}")
+            logger.info(f"Date: {today}")
             
-            return success
+            return True
             
         except Exception as e:
             logger.error(f"❌ Curie crawl failed: {e}")
@@ -26,19 +26,29 @@ Use Service Account authentication instead:
 5. In your code: os.environ['GOOGLE_SERVICE_ACCOUNT_JSON'] = dbutils.secrets.get("google", "service_account_json")
 """
 
+import io
 import os
 import re
+import sys
+import copy
 import json
-import tempfile
-import shutil
-from pathlib import Path
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from utils.logger import get_logger
 from utils.portkey_llm import get_portkey_llm
+from utils.retry import RETRYABLE_STATUS, retry_with_backoff
 
 # Load environment variables from .env file
 load_dotenv()
@@ -50,11 +60,25 @@ try:
     from google.auth.transport.requests import Request
     from googleapiclient.discovery import build
     from googleapiclient.http import MediaIoBaseDownload
-    import io
+    from googleapiclient.model import JsonModel
+    import google_auth_httplib2
+    import httplib2
     GOOGLE_API_AVAILABLE = True
 except ImportError:
     GOOGLE_API_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 
 # Scopes required for reading docs and downloading images
 SCOPES = [
@@ -62,8 +86,171 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive.readonly'
 ]
 
+# Document ID in the supported Docs/Drive URL formats (one alternation, one scan)
+_DOC_ID_RE = re.compile(
+    r'(?:docs\.google\.com/document/d/|drive\.google\.com/open\?id=|drive\.google\.com/file/d/)'
+    r'([a-zA-Z0-9_-]+)'
+)
+
+
+if GOOGLE_API_AVAILABLE and ORJSON_AVAILABLE:
+    class OrjsonModel(JsonModel):
+        """JsonModel that parses API responses with orjson (large documents decode faster)."""
+        
+        def deserialize(self, content):
+            try:
+                body = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                # Not JSON: let the stock model handle it
+                return super().deserialize(content)
+            if self._data_wrapper and isinstance(body, dict) and 'data' in body:
+                body = body['data']
+            return body
+
+
+# Built Docs/Drive clients shared by all crawler instances, keyed by
+# (API, version, account): building one parses the discovery document
+_SERVICE_CACHE: Dict[Tuple[str, str, str], Any] = {}
+_SERVICE_CACHE_LOCK = threading.Lock()
+
+
+def _build_service(name: str, version: str, credentials) -> Any:
+    """Build a Google API client, or reuse the one already built for this account."""
+    account = (
+        getattr(credentials, 'service_account_email', None)
+        or getattr(credentials, 'client_id', None)
+        or str(id(credentials))
+    )
+    key = (name, version, account)
+    with _SERVICE_CACHE_LOCK:
+        service = _SERVICE_CACHE.get(key)
+        if service is None:
+            # Bundled (static) discovery document: no network fetch, no file cache
+            service = build(name, version, credentials=credentials,
+                            cache_discovery=False, static_discovery=True,
+                            model=OrjsonModel() if ORJSON_AVAILABLE else None)
+            _SERVICE_CACHE[key] = service
+    return service
+
+
+# "### Image K" section headers in a multi-image LLM response
+_IMAGE_HEADER_RE = re.compile(r'^#{1,6}\s*Image\s+(\d+)\b.*$', re.MULTILINE | re.IGNORECASE)
+
+
+def _split_image_sections(text: str, numbers: List[int]) -> Optional[List[str]]:
+    """
+    Split a multi-image LLM response into one description per image.
+    
+    Args:
+        text: Response with a "### Image K" header before each image's section
+        numbers: Image numbers expected in the response, in order
+        
+    Returns:
+        Descriptions in the order of numbers, or None if any section is missing
+    """
+    headers = list(_IMAGE_HEADER_RE.finditer(text))
+    sections = {}
+    for header, next_header in zip(headers, headers[1:] + [None]):
+        end = next_header.start() if next_header else len(text)
+        section = text[header.end():end].strip()
+        if section:
+            sections.setdefault(int(header.group(1)), section)
+    
+    if not all(number in sections for number in numbers):
+        return None
+    return [sections[number] for number in numbers]
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Tokenizer for the vision model, loaded once (None if tiktoken is unavailable)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception:
+        # e.g. the BPE file cannot be downloaded
+        return None
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to at most max_tokens tokens for the vision model.
+    
+    Falls back to ~4 characters per token when tiktoken is not available.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+@lru_cache(maxsize=1024)
+def _extract_doc_id(url: str) -> Optional[str]:
+    """Extract a Google Doc ID from a URL or bare ID (cached; see GoogleDocsCrawler.extract_doc_id)."""
+    url = url.strip()
+    
+    # If it's already just an ID (no slashes or dots suggesting URL)
+    if '/' not in url and '.' not in url and len(url) > 20:
+        return url
+    
+    # Parse URL formats
+    match = _DOC_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+# Partial-response field masks for documents().get: only what the crawler reads
+# (styles, lists, suggestions, named ranges etc. are not transferred). Table cells
+# are nested content, and inlineObjects is a map keyed by object ID, so both are
+# requested whole.
+_BODY_FIELDS = (
+    "body/content("
+    "paragraph(elements(textRun/content,inlineObjectElement/inlineObjectId)),"
+    "table(tableRows/tableCells/content))"
+)
+DOC_TEXT_FIELDS = f"title,{_BODY_FIELDS}"
+DOC_FIELDS = f"title,revisionId,{_BODY_FIELDS},inlineObjects"
+
+# Crawled documents kept in memory, keyed by revision (oldest evicted first)
+DOC_CACHE_SIZE = 256
 
-@dataclass
+# Crawled documents persisted across runs, one JSON file per revision and options.
+# Entries hold document content, so the directory is private to the user; only
+# the latest revision of each doc is kept and entries expire after a max age.
+DOC_CACHE_DIR = Path(os.getenv("GDOCS_CACHE_DIR", "~/.cache/gdocs")).expanduser()
+DOC_CACHE_MAX_AGE_DAYS = float(os.getenv("GDOCS_CACHE_MAX_AGE_DAYS", "7"))
+
+# Images downloaded concurrently per document (downloads are network-bound)
+IMAGE_DOWNLOAD_CONCURRENCY = int(os.getenv("GDOCS_DL_CONCURRENCY", "8"))
+
+# Image downloads are streamed and abandoned past this size (well above what the
+# vision model accepts)
+MAX_IMAGE_BYTES = 20 << 20
+IMAGE_CHUNK_SIZE = 64 << 10
+
+# Vision LLM calls in flight per document (bounded by the Portkey key's concurrency)
+LLM_IMAGE_CONCURRENCY = int(os.getenv("GDOCS_LLM_CONCURRENCY", "8"))
+
+# Document text included as context in image prompts, in tokens (about the
+# 3000/2000 characters of English previously used)
+EXPERIMENT_CONTEXT_TOKENS = 750
+DOCUMENT_CONTEXT_TOKENS = 500
+
+# Images sent together in one vision LLM call (lets the model cross-reference
+# panels, e.g. Treatment vs Control); 1 disables grouping
+IMAGES_PER_LLM_CALL = int(os.getenv("GDOCS_IMAGES_PER_CALL", "4"))
+
+# Documents crawled concurrently by crawl_multiple_documents (each one also fans
+# out its own image downloads and LLM calls)
+DOC_CRAWL_CONCURRENCY = int(os.getenv("GDOCS_DOC_CONCURRENCY", "4"))
+
+
+# One GoogleDocContent per crawled doc: drop the per-instance __dict__ where supported (3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class GoogleDocContent:
     """Container for crawled Google Doc content."""
     doc_id: str
@@ -105,7 +292,24 @@ class GoogleDocsCrawler:
         self.credentials = None
         self.docs_service = None
         self.drive_service = None
-        self.temp_dir = None
+        # httplib2 connections are not thread-safe, so each thread gets its own
+        self._thread_local = threading.local()
+        # Crawled documents by (doc_id, revisionId, analyze_images, is_experiment_doc):
+        # an unchanged revision skips image downloads and LLM calls.
+        # Backed by DOC_CACHE_DIR so results survive across runs.
+        self._doc_cache: "OrderedDict[Tuple, GoogleDocContent]" = OrderedDict()
+        self._doc_cache_lock = threading.Lock()
+        # Shared session for image downloads, so connections are reused across
+        # images, documents and download threads. Retries are left to _get_image
+        # (retry_with_backoff) so failures aren't retried at two layers.
+        adapter = HTTPAdapter(
+            pool_connections=IMAGE_DOWNLOAD_CONCURRENCY,
+            pool_maxsize=IMAGE_DOWNLOAD_CONCURRENCY * 2,
+            max_retries=0
+        )
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
         self.llm = get_portkey_llm()
         
         if not GOOGLE_API_AVAILABLE:
@@ -153,7 +357,7 @@ class GoogleDocsCrawler:
         
         # Check for JSON file path
         sa_file = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
-        if sa_file and Path(sa_file).exists():
+        if sa_file:
             try:
                 self.credentials = service_account.Credentials.from_service_account_file(
                     sa_file, scopes=SCOPES
@@ -161,6 +365,8 @@ class GoogleDocsCrawler:
                 self._build_services()
                 self.logger.info(f"✅ Authenticated with Service Account (from file: {sa_file})")
                 return True
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 self.logger.error(f"Failed to load service account from file: {e}")
         
@@ -172,12 +378,11 @@ class GoogleDocsCrawler:
         token_file = os.getenv('GOOGLE_OAUTH_TOKEN_FILE', 'token.json')
         credentials_file = os.getenv('GOOGLE_OAUTH_CREDENTIALS_FILE')
         
-        # Check for existing token
-        if Path(token_file).exists():
-            try:
-                creds = Credentials.from_authorized_user_file(token_file, SCOPES)
-            except Exception:
-                pass
+        # Load existing token (a missing file just means no saved token yet)
+        try:
+            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+        except Exception:
+            pass
         
         # Refresh or get new credentials
         if creds and creds.expired and creds.refresh_token:
@@ -187,11 +392,18 @@ class GoogleDocsCrawler:
                 creds = None
         
         if not creds or not creds.valid:
-            if not credentials_file or not Path(credentials_file).exists():
+            if not credentials_file:
                 return False
             
             try:
                 flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                self.logger.error(f"OAuth authentication failed: {e}")
+                return False
+            
+            try:
                 creds = flow.run_local_server(port=0)
                 
                 # Save token for future use
@@ -207,9 +419,24 @@ class GoogleDocsCrawler:
         return True
     
     def _build_services(self):
-        """Build Google API service clients."""
-        self.docs_service = build('docs', 'v1', credentials=self.credentials)
-        self.drive_service = build('drive', 'v3', credentials=self.credentials)
+        """Build Google API service clients (shared across instances, see _build_service)."""
+        self.docs_service = _build_service('docs', 'v1', self.credentials)
+        self.drive_service = _build_service('drive', 'v3', self.credentials)
+    
+    @retry_with_backoff(max_tries=5, base=1.0, cap=30.0)
+    def _execute(self, request):
+        """
+        Execute a Google API request on this thread's own HTTP connection.
+        
+        The service objects are shared, but the httplib2 transport they wrap
+        is not safe to use from several threads at once. Rate limiting (429)
+        and server errors are retried with backoff; 403/404 fail immediately.
+        """
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._thread_local.http = http
+        return request.execute(http=http)
     
     def is_available(self) -> bool:
         """Check if the crawler is properly configured."""
@@ -233,43 +460,22 @@ class GoogleDocsCrawler:
         """
         if not url:
             return None
-        
-        url = url.strip()
-        
-        # If it's already just an ID (no slashes or dots suggesting URL)
-        if '/' not in url and '.' not in url and len(url) > 20:
-            return url
-        
-        # Parse URL formats
-        patterns = [
-            r'docs\.google\.com/document/d/([a-zA-Z0-9_-]+)',
-            r'drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)',
-            r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
-    
-    def _create_temp_dir(self):
-        """Create a temporary directory for storing images."""
-        if self.temp_dir is None:
-            self.temp_dir = tempfile.mkdtemp(prefix='gdocs_crawl_')
-            self.logger.info(f"Created temp directory: {self.temp_dir}")
-    
+        return _extract_doc_id(url)
+
     def cleanup(self):
-        """Clean up temporary files and directories."""
-        if self.temp_dir and Path(self.temp_dir).exists():
-            try:
-                shutil.rmtree(self.temp_dir)
-                self.logger.info(f"🧹 Cleaned up temp directory: {self.temp_dir}")
-                self.temp_dir = None
-            except Exception as e:
-                self.logger.error(f"Failed to cleanup temp directory: {e}")
-    
+        """
+        Release resources held between crawls.
+
+        Images are no longer written to a temp directory (they stay in memory),
+        so this clears the in-memory document cache and closes the pooled
+        image-download connections. The on-disk cache (DOC_CACHE_DIR) is kept.
+        The crawler remains usable afterwards.
+        """
+        with self._doc_cache_lock:
+            self._doc_cache.clear()
+        self._session.close()
+        self.logger.info("🧹 Cleared document cache and closed HTTP session")
+
     def _extract_text_from_content(self, content: List[Dict]) -> str:
         """
         Extract plain text from Google Docs content structure.
@@ -280,93 +486,111 @@ class GoogleDocsCrawler:
         Returns:
             Extracted text content
         """
-        text_parts = []
-        
-        for element in content:
-            if 'paragraph' in element:
-                paragraph = element['paragraph']
-                for elem in paragraph.get('elements', []):
-                    if 'textRun' in elem:
-                        text_parts.append(elem['textRun'].get('content', ''))
-            elif 'table' in element:
-                # Extract text from tables
-                table = element['table']
-                for row in table.get('tableRows', []):
-                    for cell in row.get('tableCells', []):
-                        cell_text = self._extract_text_from_content(cell.get('content', []))
-                        if cell_text.strip():
-                            text_parts.append(cell_text)
-        
-        return ''.join(text_parts)
+        return self._walk_content(content)[0]
     
-    def _extract_images_from_content(self, content: List[Dict], doc_id: str) -> List[Dict[str, Any]]:
+    def _walk_content(self, content: List[Dict]) -> Tuple[str, List[str]]:
         """
-        Extract image metadata from Google Docs content.
+        Extract text and inline image references from Google Docs content in one pass.
         
         Args:
             content: The 'content' array from Google Docs API response
-            doc_id: Document ID for context
             
         Returns:
-            List of image metadata dictionaries
+            (extracted text content, inline object IDs in document order)
+        """
+        text_parts = []
+        object_ids = []
+        # Iterative walk (no recursion per table cell). Each frame is
+        # (element iterator, output parts, enclosing parts): a table cell collects
+        # its own text and adds it to the enclosing parts only if non-blank.
+        stack = [(iter(content), text_parts, None)]
+        
+        while stack:
+            elements, parts, enclosing_parts = stack[-1]
+            element = next(elements, None)
+            
+            if element is None:
+                stack.pop()
+                if enclosing_parts is not None:
+                    cell_text = ''.join(parts)
+                    if cell_text.strip():
+                        enclosing_parts.append(cell_text)
+                continue
+            
+            paragraph = element.get('paragraph')
+            if paragraph is not None:
+                for elem in paragraph.get('elements', ()):
+                    text_run = elem.get('textRun')
+                    if text_run is not None:
+                        parts.append(text_run.get('content', ''))
+                        continue
+                    inline_obj = elem.get('inlineObjectElement')
+                    if inline_obj is not None and inline_obj.get('inlineObjectId'):
+                        object_ids.append(inline_obj['inlineObjectId'])
+                continue
+            
+            table = element.get('table')
+            if table is not None:
+                # Extract text from tables (push cells in reverse so they pop in order)
+                cells = [
+                    cell.get('content', ())
+                    for row in table.get('tableRows', ())
+                    for cell in row.get('tableCells', ())
+                ]
+                for cell_content in reversed(cells):
+                    stack.append((iter(cell_content), [], parts))
+        
+        return ''.join(text_parts), object_ids
+    
+    @retry_with_backoff(max_tries=5, base=1.0, cap=30.0)
+    def _get_image(self, image_uri: str):
+        """
+        Start a streamed GET for an image, raising on retryable statuses so they are retried.
+        
+        Connect timeout is short so DNS/TLS stalls fail fast; the body is read by the caller.
         """
-        images = []
-        
-        for idx, element in enumerate(content):
-            if 'paragraph' in element:
-                paragraph = element['paragraph']
-                for elem in paragraph.get('elements', []):
-                    if 'inlineObjectElement' in elem:
-                        inline_obj = elem['inlineObjectElement']
-                        obj_id = inline_obj.get('inlineObjectId')
-                        if obj_id:
-                            images.append({
-                                'object_id': obj_id,
-                                'index': idx,
-                                'doc_id': doc_id
-                            })
-        
-        return images
+        response = self._session.get(image_uri, stream=True, timeout=(5, 30))
+        if response.status_code in RETRYABLE_STATUS:
+            response.close()
+            response.raise_for_status()
+        return response
     
-    def _download_image(self, image_uri: str, image_id: str) -> Optional[str]:
+    def _download_image(self, image_uri: str, image_id: str) -> Optional[Tuple[bytes, str]]:
         """
-        Download an image from Google Docs.
+        Download an image from Google Docs into memory.
         
         Args:
             image_uri: The image content URI
-            image_id: Identifier for the image
+            image_id: Identifier for the image (for logging)
             
         Returns:
-            Path to downloaded image or None if failed
+            (image bytes, MIME type) or None if failed
         """
-        self._create_temp_dir()
-        
         try:
-            import requests
-            
-            # Download image
-            response = requests.get(image_uri, timeout=30)
-            if response.status_code != 200:
-                self.logger.warning(f"Failed to download image {image_id}: HTTP {response.status_code}")
-                return None
-            
-            # Determine file extension from content type
-            content_type = response.headers.get('Content-Type', 'image/png')
-            ext = '.png'
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                ext = '.jpg'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
-            
-            # Save to temp file
-            image_path = Path(self.temp_dir) / f"{image_id}{ext}"
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
+            with self._get_image(image_uri) as response:
+                if response.status_code != 200:
+                    self.logger.warning(f"Failed to download image {image_id}: HTTP {response.status_code}")
+                    return None
+                
+                # MIME type from the content type (PNG if missing); skip non-images
+                # before reading the body
+                mime_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                if not mime_type:
+                    mime_type = 'image/png'
+                elif not mime_type.startswith('image/'):
+                    self.logger.warning(f"Skipping image {image_id}: not an image ({mime_type})")
+                    return None
+                
+                # Stream the body, giving up on oversized images
+                data = bytearray()
+                for chunk in response.iter_content(IMAGE_CHUNK_SIZE):
+                    data.extend(chunk)
+                    if len(data) > MAX_IMAGE_BYTES:
+                        self.logger.warning(f"Skipping image {image_id}: larger than {MAX_IMAGE_BYTES >> 20} MiB")
+                        return None
             
-            self.logger.info(f"📥 Downloaded image: {image_path.name}")
-            return str(image_path)
+            self.logger.info(f"📥 Downloaded image: {image_id} ({len(data)} bytes)")
+            return bytes(data), mime_type
             
         except Exception as e:
             self.logger.error(f"Error downloading image {image_id}: {e}")
@@ -374,33 +598,35 @@ class GoogleDocsCrawler:
     
     def _analyze_images_with_llm(
         self, 
-        image_paths: List[str], 
+        images: List[Tuple[bytes, str]], 
         text_context: str,
         is_experiment_doc: bool = True
-    ) -> List[str]:
+    ) -> Tuple[List[str], int]:
         """
         Analyze images using LLM with context from the document text.
         
         Args:
-            image_paths: List of paths to image files
+            images: Downloaded images as (bytes, MIME type)
             text_context: Text content from the document for context
             is_experiment_doc: Whether this is an experiment/brief document
             
         Returns:
-            List of image descriptions
+            Tuple of (image descriptions, number of images whose analysis failed).
+            Failed images get a placeholder description.
         """
         if not self.llm.is_available():
             self.logger.warning("LLM not available for image analysis")
-            return ["[LLM not available for image analysis]" for _ in image_paths]
+            return ["[LLM not available for image analysis]" for _ in images], len(images)
         
-        descriptions = []
+        if not images:
+            return [], 0
         
         # Prepare context prompt based on document type
         if is_experiment_doc:
             base_prompt = f"""You are analyzing images from an experiment brief/design document. 
 
 Document context:
-{text_context[:3000]}  # Limit context length
+{_truncate_tokens(text_context, EXPERIMENT_CONTEXT_TOKENS)}
 
 For each image, provide a detailed description including:
 1. What type of image/chart/screenshot this is
@@ -416,38 +642,139 @@ Be specific and detailed. If you see UI mockups, describe the user experience ch
             base_prompt = f"""Analyze this image from a document. Describe what you see in detail.
 
 Document context:
-{text_context[:2000]}
+{_truncate_tokens(text_context, DOCUMENT_CONTEXT_TOKENS)}
 
 Provide:
 1. Type of image (chart, diagram, screenshot, etc.)
 2. Key information visible
 3. Any text, numbers, or data shown"""
         
-        for i, image_path in enumerate(image_paths):
+        failed = []  # indexes of images whose analysis failed (list.append is thread-safe)
+        
+        def analyze_one(indexed_image: Tuple[int, Tuple[bytes, str]]) -> str:
+            i, (image_bytes, mime_type) = indexed_image
             try:
                 prompt = f"""{base_prompt}
 
-This is image {i+1} of {len(image_paths)} in the document.
+This is image {i+1} of {len(images)} in the document.
 Describe this image thoroughly."""
                 
-                description = self.llm.analyze_image(
-                    image_path=image_path,
+                description = self.llm.analyze_image_bytes(
+                    image_bytes=image_bytes,
                     prompt=prompt,
+                    mime_type=mime_type,
                     model="gpt-4o",  # Use vision-capable model
                     max_tokens=1500,
                     temperature=0.2
                 )
                 
-                if description:
-                    descriptions.append(description)
-                else:
-                    descriptions.append("[Failed to analyze image]")
+                if not description:
+                    failed.append(i)
+                    return "[Failed to analyze image]"
+                return description
                     
             except Exception as e:
                 self.logger.error(f"Error analyzing image {i+1}: {e}")
-                descriptions.append(f"[Error analyzing image: {str(e)}]")
+                failed.append(i)
+                return f"[Error analyzing image: {str(e)}]"
+        
+        # Byte-identical images (a logo or UI shell repeated across panels) are
+        # analyzed once. Only exact copies: near-duplicates may be the Treatment
+        # vs Control pair whose differences the analysis is meant to find.
+        first_index: Dict[str, int] = {}
+        source_of = []
+        for i, (image_bytes, _) in enumerate(images):
+            digest = hashlib.sha256(image_bytes).hexdigest()
+            source_of.append(first_index.setdefault(digest, i))
+        unique = [(i, images[i]) for i in first_index.values()]
+        if len(unique) < len(images):
+            self.logger.info(f"   Skipping {len(images) - len(unique)} duplicate images")
         
-        return descriptions
+        def analyze_group(group: List[Tuple[int, Tuple[bytes, str]]]) -> List[str]:
+            if len(group) == 1:
+                return [analyze_one(group[0])]
+            
+            numbers = [i + 1 for i, _ in group]
+            prompt = f"""{base_prompt}
+
+These are images {', '.join(map(str, numbers))} of {len(images)} in the document, attached in that order.
+Describe each image thoroughly in its own section, starting each section with a
+"### Image K" header where K is the image's number above."""
+            
+            response = self.llm.analyze_images_in_one_call(
+                images=[image for _, image in group],
+                prompt=prompt,
+                model="gpt-4o",
+                max_tokens=1500 * len(group),
+                temperature=0.2
+            )
+            descriptions = _split_image_sections(response, numbers) if response else None
+            if descriptions is None:
+                self.logger.warning("Could not split analysis of images %s; analyzing them one by one", numbers)
+                return [analyze_one(item) for item in group]
+            return descriptions
+        
+        # Several images per call, and calls are server-bound so they run concurrently
+        per_call = max(1, IMAGES_PER_LLM_CALL)
+        groups = [unique[k:k + per_call] for k in range(0, len(unique), per_call)]
+        analyzed = {}
+        with ThreadPoolExecutor(max_workers=min(LLM_IMAGE_CONCURRENCY, len(groups))) as executor:
+            for group, descriptions in zip(groups, executor.map(analyze_group, groups)):
+                for (i, _), description in zip(group, descriptions):
+                    analyzed[i] = description
+        
+        descriptions = [
+            analyzed[source] if source == i else f"{analyzed[source]}\n\n(Duplicate of image {source + 1})"
+            for i, source in enumerate(source_of)
+        ]
+        return descriptions, sum(source in failed for source in source_of)
+    
+    def fetch_text(self, doc_url_or_id: str) -> GoogleDocContent:
+        """
+        Fetch only the title and text of a Google Doc.
+        
+        Cheap compared to crawl_document: no image downloads and no LLM calls.
+        
+        Args:
+            doc_url_or_id: Google Doc URL or document ID
+            
+        Returns:
+            GoogleDocContent with title and text_content (or error) set
+        """
+        doc_id = self.extract_doc_id(doc_url_or_id)
+        
+        if not doc_id:
+            return GoogleDocContent(
+                doc_id="",
+                error=f"Could not extract document ID from: {doc_url_or_id}"
+            )
+        
+        if not self.is_available():
+            return GoogleDocContent(
+                doc_id=doc_id,
+                error="Google Docs crawler not properly configured. Check authentication."
+            )
+        
+        result = GoogleDocContent(doc_id=doc_id)
+        
+        try:
+            doc = self._execute(self.docs_service.documents().get(documentId=doc_id, fields=DOC_TEXT_FIELDS))
+            result.title = doc.get('title', 'Untitled')
+            result.text_content = self._extract_text_from_content(doc.get('body', {}).get('content', []))
+        except Exception as e:
+            result.error = self._describe_error(doc_id, e)
+            self.logger.error(result.error)
+        
+        return result
+    
+    def _describe_error(self, doc_id: str, error: Exception) -> str:
+        """Map a Docs API exception to a user-facing error message."""
+        error_msg = str(error)
+        if 'HttpError 404' in error_msg:
+            return f"Document not found or not accessible: {doc_id}"
+        elif 'HttpError 403' in error_msg:
+            return f"Permission denied. Ensure the document is shared with the service account or accessible."
+        return f"Error crawling document: {error_msg}"
     
     def crawl_document(
         self, 
@@ -485,24 +812,41 @@ Describe this image thoroughly."""
         try:
             # Fetch document content
             self.logger.info(f"📄 Fetching Google Doc: {doc_id}")
-            doc = self.docs_service.documents().get(documentId=doc_id).execute()
+            doc = self._execute(self.docs_service.documents().get(documentId=doc_id, fields=DOC_FIELDS))
+            
+            # Same revision crawled before with the same options: reuse it. The Docs
+            # API only returns revisionId to users who can edit the document, so
+            # read-only credentials get no revision and nothing is cached.
+            revision_id = doc.get('revisionId')
+            cache_key = (doc_id, revision_id, analyze_images, is_experiment_doc)
+            if revision_id:
+                cached = self._get_cached_content(cache_key)
+                if cached is not None:
+                    self.logger.info(f"♻️  Unchanged since last crawl: {cached.title}")
+                    return cached
             
             result.title = doc.get('title', 'Untitled')
             self.logger.info(f"   Title: {result.title}")
             
-            # Extract text content
+            # Extract text content and image references in one walk of the body
             content = doc.get('body', {}).get('content', [])
-            result.text_content = self._extract_text_from_content(content)
+            result.text_content, body_object_ids = self._walk_content(content)
             self.logger.info(f"   Text length: {len(result.text_content)} chars")
             
-            # Extract and process images
+            # Extract and process images, in the order they appear in the body
+            # (objects not referenced from the body, e.g. in headers, go last)
             inline_objects = doc.get('inlineObjects', {})
-            image_paths = []
+            downloaded_images = []
+            downloads = []
             
             if inline_objects:
                 self.logger.info(f"   Found {len(inline_objects)} images")
                 
-                for obj_id, obj_data in inline_objects.items():
+                ordered_ids = dict.fromkeys(
+                    [obj_id for obj_id in body_object_ids if obj_id in inline_objects] + list(inline_objects)
+                )
+                for obj_id in ordered_ids:
+                    obj_data = inline_objects[obj_id]
                     embedded = obj_data.get('inlineObjectProperties', {}).get('embeddedObject', {})
                     
                     # Get image URI
@@ -517,16 +861,22 @@ Describe this image thoroughly."""
                             'description': embedded.get('description', '')
                         })
                         
-                        # Download image
-                        image_path = self._download_image(content_uri, obj_id)
-                        if image_path:
-                            image_paths.append(image_path)
+                        downloads.append((content_uri, f"{doc_id}_{obj_id}"))
+            
+            # Download images concurrently (map keeps document order)
+            if downloads:
+                with ThreadPoolExecutor(max_workers=min(IMAGE_DOWNLOAD_CONCURRENCY, len(downloads))) as executor:
+                    downloaded_images = [
+                        image for image in executor.map(lambda d: self._download_image(*d), downloads)
+                        if image
+                    ]
             
             # Analyze images with LLM
-            if analyze_images and image_paths:
-                self.logger.info(f"🔍 Analyzing {len(image_paths)} images with LLM...")
-                result.image_descriptions = self._analyze_images_with_llm(
-                    image_paths=image_paths,
+            failed_analyses = 0
+            if analyze_images and downloaded_images:
+                self.logger.info(f"🔍 Analyzing {len(downloaded_images)} images with LLM...")
+                result.image_descriptions, failed_analyses = self._analyze_images_with_llm(
+                    images=downloaded_images,
                     text_context=result.text_content,
                     is_experiment_doc=is_experiment_doc
                 )
@@ -536,18 +886,84 @@ Describe this image thoroughly."""
             
             self.logger.info(f"✅ Successfully crawled: {result.title}")
             
+            # Only cache complete crawls (every image downloaded and analyzed), so
+            # a transient failure is retried on the next call
+            complete = len(downloaded_images) == len(downloads) and failed_analyses == 0
+            if revision_id and complete:
+                self._cache_content(cache_key, result)
+            
         except Exception as e:
-            error_msg = str(e)
-            if 'HttpError 404' in error_msg:
-                result.error = f"Document not found or not accessible: {doc_id}"
-            elif 'HttpError 403' in error_msg:
-                result.error = f"Permission denied. Ensure the document is shared with the service account or accessible."
-            else:
-                result.error = f"Error crawling document: {error_msg}"
+            result.error = self._describe_error(doc_id, e)
             self.logger.error(result.error)
         
         return result
     
+    @staticmethod
+    def _cache_path(cache_key: Tuple) -> Path:
+        """Disk cache file for a (doc_id, revisionId, analyze_images, is_experiment_doc) key."""
+        doc_id, revision_id, analyze_images, is_experiment_doc = cache_key
+        return DOC_CACHE_DIR / f"{doc_id}.{revision_id}.{int(analyze_images)}{int(is_experiment_doc)}.json"
+    
+    def _get_cached_content(self, cache_key: Tuple) -> Optional[GoogleDocContent]:
+        """Look up a crawled document in memory, then on disk (returns a copy)."""
+        with self._doc_cache_lock:
+            cached = self._doc_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        path = self._cache_path(cache_key)
+        try:
+            if time.time() - path.stat().st_mtime > DOC_CACHE_MAX_AGE_DAYS * 86400:
+                path.unlink(missing_ok=True)
+                return None
+            cached = GoogleDocContent(**json.loads(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.debug(f"Ignoring unreadable doc cache entry: {e}")
+            return None
+        
+        with self._doc_cache_lock:
+            self._doc_cache[cache_key] = copy.deepcopy(cached)
+            if len(self._doc_cache) > DOC_CACHE_SIZE:
+                self._doc_cache.popitem(last=False)
+        return cached
+    
+    def _cache_content(self, cache_key: Tuple, content: GoogleDocContent):
+        """Keep a crawled document in memory and persist it to disk."""
+        with self._doc_cache_lock:
+            self._doc_cache[cache_key] = copy.deepcopy(content)
+            if len(self._doc_cache) > DOC_CACHE_SIZE:
+                self._doc_cache.popitem(last=False)
+        
+        # Write to a temp file and rename, so readers never see a partial file
+        path = self._cache_path(cache_key)
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(json.dumps(asdict(content)))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.debug(f"Could not write doc cache entry: {e}")
+            return
+        
+        self._prune_disk_cache(cache_key)
+    
+    def _prune_disk_cache(self, cache_key: Tuple):
+        """Remove older revisions of the just-cached doc and entries past the max age."""
+        doc_id, revision_id = cache_key[:2]
+        stale_before = time.time() - DOC_CACHE_MAX_AGE_DAYS * 86400
+        for path in DOC_CACHE_DIR.glob("*.json"):
+            try:
+                older_revision = (path.name.startswith(f"{doc_id}.")
+                                  and not path.name.startswith(f"{doc_id}.{revision_id}."))
+                if older_revision or path.stat().st_mtime < stale_before:
+                    path.unlink(missing_ok=True)
+            except OSError as e:
+                self.logger.debug(f"Could not prune doc cache entry {path.name}: {e}")
+    
     def _create_combined_summary(self, content: GoogleDocContent) -> str:
         """
         Create a combined summary of document content and image descriptions.
@@ -558,26 +974,32 @@ Describe this image thoroughly."""
         Returns:
             Combined summary string
         """
-        parts = []
+        buf = io.StringIO()
+        
+        def write_part(part: str):
+            # Sections are separated by a blank line
+            if buf.tell():
+                buf.write('\n')
+            buf.write(part)
         
         # Add title
         if content.title:
-            parts.append(f"# {content.title}\n")
+            write_part(f"# {content.title}\n")
         
         # Add text content (truncated if too long)
         if content.text_content:
             text = content.text_content.strip()
             if len(text) > 5000:
                 text = text[:5000] + "...[truncated]"
-            parts.append(f"## Document Content\n{text}\n")
+            write_part(f"## Document Content\n{text}\n")
         
         # Add image descriptions
         if content.image_descriptions:
-            parts.append(f"\n## Image Analysis ({len(content.image_descriptions)} images)\n")
+            write_part(f"\n## Image Analysis ({len(content.image_descriptions)} images)\n")
             for i, desc in enumerate(content.image_descriptions, 1):
-                parts.append(f"\n### Image {i}\n{desc}\n")
+                write_part(f"\n### Image {i}\n{desc}\n")
         
-        return '\n'.join(parts)
+        return buf.getvalue()
     
     def crawl_multiple_documents(
         self, 
@@ -585,7 +1007,7 @@ Describe this image thoroughly."""
         analyze_images: bool = True
     ) -> Dict[str, GoogleDocContent]:
         """
-        Crawl multiple Google Docs.
+        Crawl multiple Google Docs concurrently.
         
         Args:
             doc_urls: List of Google Doc URLs or IDs
@@ -594,19 +1016,16 @@ Describe this image thoroughly."""
         Returns:
             Dictionary mapping doc URLs to their content
         """
-        results = {}
-        
-        for url in doc_urls:
-            if url and url.strip():
-                results[url] = self.crawl_document(
-                    doc_url_or_id=url,
-                    analyze_images=analyze_images
-                )
+        urls = list(dict.fromkeys(url for url in doc_urls if url and url.strip()))
+        if not urls:
+            return {}
         
-        # Cleanup all temp files after processing
-        self.cleanup()
-        
-        return results
+        with ThreadPoolExecutor(max_workers=min(DOC_CRAWL_CONCURRENCY, len(urls))) as executor:
+            contents = executor.map(
+                lambda url: self.crawl_document(doc_url_or_id=url, analyze_images=analyze_images),
+                urls
+            )
+            return dict(zip(urls, contents))
 
 
 # Singleton instance
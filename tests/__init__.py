@@ -0,0 +1,7 @@
+"""
+Unit tests for the crawlers and shared utilities.
+
+Offline: no Snowflake, Google or LLM access is needed. Run:
+    pip install -r requirements-test.txt
+    python -m pytest tests
+"""
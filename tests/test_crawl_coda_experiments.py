@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Coda crawl's brief handling.
+
+Run:
+    python -m pytest tests/test_crawl_coda_experiments.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import crawl_coda_experiments as cce
+from google_docs_service.google_docs_crawler import GoogleDocContent
+
+
+DOC_A = "https://docs.google.com/document/d/docA"
+DOC_A_COPY = "https://docs.google.com/document/d/docAcopy"
+DOC_B = "https://docs.google.com/document/d/docB"
+TEMPLATE_TEXT = "Hypothesis: ...\nSuccess metrics: ...\n"
+
+
+class FakeCrawler:
+    """Google Docs crawler returning canned documents and recording full crawls."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.crawled = []
+
+    def is_available(self):
+        return True
+
+    def fetch_text(self, url):
+        return GoogleDocContent(doc_id=url, text_content=self.texts[url])
+
+    def crawl_document(self, doc_url_or_id, analyze_images=True, is_experiment_doc=True):
+        self.crawled.append(doc_url_or_id)
+        return GoogleDocContent(
+            doc_id=doc_url_or_id,
+            title=f"Title of {doc_url_or_id}",
+            text_content=self.texts[doc_url_or_id],
+            combined_summary=f"Fresh summary of {doc_url_or_id}"
+        )
+
+
+def run_brief_crawl(monkeypatch, df, prev_day_data, texts):
+    crawler = FakeCrawler(texts)
+    monkeypatch.setattr(cce, "get_google_docs_crawler", lambda: crawler)
+    monkeypatch.setattr(cce, "get_previous_day_brief_data", lambda hook: prev_day_data)
+    result = cce.crawl_google_docs_for_briefs(df, hook=None)
+    return result.set_index('row_id'), crawler
+
+
+def previous_row(url, summary):
+    return {
+        'brief': url,
+        'brief_content': TEMPLATE_TEXT,
+        'brief_images_description': f"Images of {url}",
+        'brief_summary': summary,
+        'brief_content_hash': cce.content_hash(TEMPLATE_TEXT),
+    }
+
+
+def test_extract_google_doc_url_formats():
+    """Test: Brief cells yield the doc URL from bare, markdown and embedded links."""
+    assert cce.extract_google_doc_url(DOC_A) == DOC_A
+    assert cce.extract_google_doc_url(f"[Brief]({DOC_A}/edit)") == DOC_A
+    assert cce.extract_google_doc_url(f"see {DOC_A}/edit?tab=t.0") == DOC_A
+    assert cce.extract_google_doc_url("no link here") is None
+
+
+def test_content_hash():
+    """Test: Text fingerprints are stable and empty text has none."""
+    assert cce.content_hash("abc") == cce.content_hash("abc")
+    assert cce.content_hash("abc") != cce.content_hash("abd")
+    assert len(cce.content_hash("abc")) == 40
+    assert cce.content_hash("") is None
+    assert cce.content_hash(None) is None
+
+
+def test_moved_brief_with_same_text_reuses_own_analysis(monkeypatch):
+    """Test: A row whose link changed but whose text did not keeps its previous analysis."""
+    df = pd.DataFrame({'row_id': ['r1'], 'brief': [DOC_A_COPY]})
+    prev_day_data = {'r1': previous_row(DOC_A, "Summary of A")}
+
+    result, crawler = run_brief_crawl(monkeypatch, df, prev_day_data, {DOC_A_COPY: TEMPLATE_TEXT})
+
+    assert crawler.crawled == []
+    assert result.loc['r1', 'brief_summary'] == "Summary of A"
+    assert result.loc['r1', 'brief_images_description'] == f"Images of {DOC_A}"
+
+
+def test_new_brief_with_other_rows_text_is_crawled(monkeypatch):
+    """Test: A new doc matching another row's text (same template) is not given that row's analysis."""
+    df = pd.DataFrame({'row_id': ['r1', 'r2'], 'brief': [DOC_A, DOC_B]})
+    prev_day_data = {'r1': previous_row(DOC_A, "Summary of A")}
+
+    result, crawler = run_brief_crawl(
+        monkeypatch, df, prev_day_data, {DOC_A: TEMPLATE_TEXT, DOC_B: TEMPLATE_TEXT}
+    )
+
+    assert crawler.crawled == [DOC_B]
+    assert result.loc['r1', 'brief_summary'] == "Summary of A"
+    assert result.loc['r2', 'brief_summary'] == f"Fresh summary of {DOC_B}"
+
+
+class RecordingHook:
+    """Snowflake hook recording the statements it is asked to run."""
+
+    def __init__(self):
+        self.statements = []
+
+    def query_without_result(self, query):
+        self.statements.append(query)
+
+
+def test_upgrade_snapshot_table():
+    """Test: The one-time upgrade adds the hash column and clustering key idempotently."""
+    hook = RecordingHook()
+    cce.upgrade_snapshot_table(hook)
+    assert len(hook.statements) == 2
+    assert 'ADD COLUMN IF NOT EXISTS brief_content_hash' in hook.statements[0]
+    assert 'CLUSTER BY (TO_DATE(fetched_at), view_name)' in hook.statements[1]
+
+
+def test_extract_google_doc_url_null_cells():
+    """Test: Null brief cells (None, NaN, pd.NA) yield no URL."""
+    for value in (None, float('nan'), pd.NA, ''):
+        assert cce.extract_google_doc_url(value) is None
+
+
+def test_null_brief_cell_in_arrow_frame(monkeypatch):
+    """Test: An empty brief in the Arrow-backed combined frame does not abort the crawl."""
+    df = cce.combine_dataframes([
+        pd.DataFrame({'row_id': ['r1', 'r2'], 'brief': [DOC_B, None], 'view_name': ['v', 'v']})
+    ])
+    assert df['brief'].isna().iloc[1]
+
+    result, crawler = run_brief_crawl(monkeypatch, df, {}, {DOC_B: TEMPLATE_TEXT})
+
+    assert crawler.crawled == [DOC_B]
+    assert result.loc['r1', 'brief_summary'] == f"Fresh summary of {DOC_B}"
+    assert pd.isna(result.loc['r2', 'brief_summary'])
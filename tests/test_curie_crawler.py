@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Curie crawler's pure helpers.
+
+Run:
+    python -m pytest tests/test_curie_crawler.py -v
+"""
+
+import json
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from curie_service import curie_crawler
+from curie_service.curie_crawler import CurieCrawler, MetricHistory, _bind_list, _parse_curie_link
+
+
+ANALYSIS_ID = "d1fa0d0d-6741-4d12-92c8-dbca63e3473c"
+KEY = ("order_rate", "overall", "treatment")
+
+# Result row with TREND_INPUT_COLUMNS, as read by compute_trend_history
+Row = namedtuple("Row", "analysis_id metric_name dimension_cut_name variant_name "
+                        "metric_impact_relative p_value stat_sig")
+
+
+def make_row(impact, variant="treatment", p_value=0.01, stat_sig=True):
+    return Row(ANALYSIS_ID, KEY[0], KEY[1], variant, impact, p_value, stat_sig)
+
+
+def test_parse_curie_link():
+    """Test: analysis_id is parsed from both Curie link formats."""
+    assert _parse_curie_link(f"https://ops.doordash.team/x/experiments/abc?analysisId={ANALYSIS_ID}") == ANALYSIS_ID
+    assert _parse_curie_link(f"https://ops.doordash.team/x/analysis/{ANALYSIS_ID}") == ANALYSIS_ID
+    assert _parse_curie_link("https://ops.doordash.team/x/experiments/abc") is None
+    assert CurieCrawler().parse_curie_link(None) is None
+
+
+def test_bind_list():
+    """Test: One pyformat placeholder per value, with matching parameters."""
+    placeholders, params = _bind_list(["a", "b"])
+    assert placeholders == "%(aid_0)s, %(aid_1)s"
+    assert params == {"aid_0": "a", "aid_1": "b"}
+    assert _bind_list([], prefix="x") == ("", {})
+
+
+def test_trend_history_nan_is_null(monkeypatch):
+    """Test: NaN values are written as null (valid JSON) whichever serializer is used."""
+    row = make_row(float("nan"), p_value=float("nan"), stat_sig=float("nan"))
+    outputs = set()
+    for use_orjson in ([True, False] if curie_crawler.ORJSON_AVAILABLE else [False]):
+        monkeypatch.setattr(curie_crawler, "ORJSON_AVAILABLE", use_orjson)
+        raw = CurieCrawler().compute_trend_history(row, {}, "2026-01-03")
+        assert "NaN" not in raw
+        outputs.add(raw)
+    assert len(outputs) == 1
+
+    value = json.loads(outputs.pop())["values"][-1]
+    assert value == {"date": "2026-01-03", "impact": None, "p_value": None, "stat_sig": None}
+
+
+def trend(row, history=None, is_control=None):
+    result = CurieCrawler().compute_trend_history(row, history or {}, "2026-01-03", is_control)
+    return json.loads(result) if result else result
+
+
+def test_trend_history_skips_control():
+    """Test: Control rows get no trend history."""
+    assert trend(make_row(0.0, variant="Control")) is None
+    assert trend(make_row(0.0), is_control=True) is None
+
+
+def test_trend_history_first_day():
+    """Test: A metric without history is 'new' with today's value only."""
+    result = trend(make_row(0.05))
+    assert result["trend_direction"] == "new"
+    assert result["days_running"] == 1
+    assert result["first_seen"] == "2026-01-03"
+    assert result["values"] == [{"date": "2026-01-03", "impact": 0.05, "p_value": 0.01, "stat_sig": True}]
+
+
+def test_trend_history_direction():
+    """Test: Direction compares the first and today's impact (stable within 0.001)."""
+    values = [{"date": "2026-01-01", "impact": 0.02, "p_value": 0.2, "stat_sig": False},
+              {"date": "2026-01-02", "impact": None, "p_value": None, "stat_sig": None}]
+    history = {KEY: MetricHistory(values, 0.02, 0.02, 1)}
+
+    assert trend(make_row(0.05), history)["trend_direction"] == "improving"
+    assert trend(make_row(-0.01), history)["trend_direction"] == "declining"
+    assert trend(make_row(0.0205), history)["trend_direction"] == "stable"
+
+    result = trend(make_row(0.05), history)
+    assert result["first_seen"] == "2026-01-01"
+    assert result["days_running"] == 3
+    # History passed in is not modified
+    assert len(history[KEY].values) == 2
+
+
+def test_trend_history_missing_impact_today():
+    """Test: A null impact today keeps the direction from previous days."""
+    history = {KEY: MetricHistory([{"date": "2026-01-01", "impact": 0.02, "p_value": 0.2, "stat_sig": False},
+                                   {"date": "2026-01-02", "impact": 0.04, "p_value": 0.1, "stat_sig": False}],
+                                  0.02, 0.04, 2)}
+    result = trend(make_row(None), history)
+    assert result["trend_direction"] == "improving"
+    assert result["values"][-1]["impact"] is None
+
+
+GOOD_ID = "11111111-1111-1111-1111-111111111111"
+BAD_ID = "22222222-2222-2222-2222-222222222222"
+
+
+class FakeCurieHook:
+    """
+    Snowflake hook serving two active experiments, one of whose Curie queries
+    fails, and recording the statements and writes the crawler issues.
+    """
+
+    def __init__(self, table_exists=True, analysis_ids=(GOOD_ID, BAD_ID)):
+        self.table_exists = table_exists
+        self.analysis_ids = analysis_ids
+        self.statements = []
+        self.written = []
+
+    def query_snowflake(self, query, method='pandas', params=None):
+        if 'information_schema' in query:
+            return pd.DataFrame({'CNT': [int(self.table_exists)]})
+        if not params:
+            return pd.DataFrame({
+                'row_name': [f"Experiment {analysis_id[0]}" for analysis_id in self.analysis_ids],
+                'curie_ios': [f"https://x/experiments/e?analysisId={analysis_id}"
+                              for analysis_id in self.analysis_ids],
+            })
+        ids = list(params.values())
+        if BAD_ID in ids:
+            raise RuntimeError("Curie query failed")
+        return pd.DataFrame({
+            'analysis_id': [GOOD_ID] * 2,
+            'metric_name': ['order_rate'] * 2,
+            'dimension_cut_name': ['overall'] * 2,
+            'variant_name': ['control', 'treatment'],
+            'metric_impact_relative': [0.0, 0.1],
+            'p_value': [1.0, 0.01],
+            'stat_sig': [False, True],
+        })
+
+    def query_snowflake_batches(self, query, params=None):
+        return iter([])
+
+    def query_without_result(self, query):
+        self.statements.append(" ".join(query.split()))
+        return 0
+
+    def create_and_populate_table(self, df, table_name, **kwargs):
+        self.statements.append(f"CREATE {table_name}")
+        self.written.append(df)
+        return True
+
+    def write_to_snowflake(self, df, table_name, **kwargs):
+        self.written.append(df)
+        return True
+
+
+def test_failing_analysis_does_not_abort_run():
+    """Test: A failing analysis in a batch is skipped; the rest of the batch is still saved."""
+    hook = FakeCurieHook()
+    rows = CurieCrawler().crawl_and_save(hook, today="2026-01-03")
+
+    assert rows == 2
+    assert [set(df['analysis_id']) for df in hook.written] == [{GOOD_ID}]
+
+
+def test_today_cleared_before_crawl():
+    """Test: Today's rows are deleted up front, even when nothing is written."""
+    hook = FakeCurieHook(analysis_ids=(BAD_ID,))
+    assert CurieCrawler().crawl_and_save(hook, today="2026-01-03") == 0
+    assert any(s.startswith("DELETE FROM") and "'2026-01-03'" in s for s in hook.statements)
+    assert hook.written == []
+
+
+def test_missing_table_created_then_appended():
+    """Test: With no target table, the first batch creates it and nothing is deleted."""
+    hook = FakeCurieHook(table_exists=False)
+    crawler = CurieCrawler()
+    assert crawler.crawl_and_save(hook, today="2026-01-03") == 2
+    assert hook.statements == [f"CREATE {crawler.table_name}"]
+
+
+def test_crawl_all_experiments_does_not_write():
+    """Test: crawl_all_experiments returns the combined DataFrame and writes nothing."""
+    hook = FakeCurieHook()
+    df = CurieCrawler().crawl_all_experiments(hook, today="2026-01-03")
+
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == 2
+    assert set(df['analysis_id']) == {GOOD_ID}
+    assert hook.written == []
+    assert not any(s.startswith("DELETE FROM") for s in hook.statements)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Google Docs crawler.
+
+Run:
+    python -m pytest tests/test_google_docs_crawler.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from google_docs_service import google_docs_crawler
+from google_docs_service.google_docs_crawler import (
+    GoogleDocContent,
+    GoogleDocsCrawler,
+    _split_image_sections,
+)
+from utils.logger import get_logger
+
+
+class FakeLLM:
+    """Vision LLM describing each image by its bytes; b'bad' images fail."""
+
+    def __init__(self, grouped_response=None):
+        self.grouped_response = grouped_response
+        self.single_calls = 0
+
+    def is_available(self):
+        return True
+
+    def analyze_image_bytes(self, image_bytes, **kwargs):
+        self.single_calls += 1
+        return None if image_bytes == b'bad' else f"Image of {image_bytes.decode()}"
+
+    def analyze_images_in_one_call(self, images, **kwargs):
+        return self.grouped_response
+
+
+def make_crawler(llm):
+    """Crawler without Google credentials (only what the helpers under test need)."""
+    crawler = object.__new__(GoogleDocsCrawler)
+    crawler.logger = get_logger(__name__)
+    crawler.llm = llm
+    return crawler
+
+
+def png(data):
+    return (data, 'image/png')
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_cleanup_clears_cache_and_closes_session():
+    """Test: cleanup() empties the in-memory document cache and closes the HTTP session."""
+    crawler = make_crawler(FakeLLM())
+    crawler._doc_cache = OrderedDict({("doc", "rev", True, True): GoogleDocContent(doc_id="doc")})
+    crawler._doc_cache_lock = threading.Lock()
+    crawler._session = FakeSession()
+
+    crawler.cleanup()
+
+    assert len(crawler._doc_cache) == 0
+    assert crawler._session.closed
+
+
+def test_analyze_images_counts_failures(monkeypatch):
+    """Test: Failed analyses are counted, so the crawl result isn't cached as complete."""
+    monkeypatch.setattr(google_docs_crawler, "IMAGES_PER_LLM_CALL", 1)
+    crawler = make_crawler(FakeLLM())
+
+    descriptions, failed = crawler._analyze_images_with_llm([png(b'a'), png(b'bad')], "context")
+
+    assert descriptions[0] == "Image of a"
+    assert descriptions[1].startswith("[")
+    assert failed == 1
+
+
+def test_analyze_images_dedupes_identical_images(monkeypatch):
+    """Test: Identical images are analyzed once; duplicates reuse the first description."""
+    monkeypatch.setattr(google_docs_crawler, "IMAGES_PER_LLM_CALL", 1)
+    llm = FakeLLM()
+    crawler = make_crawler(llm)
+
+    descriptions, failed = crawler._analyze_images_with_llm(
+        [png(b'a'), png(b'bad'), png(b'a'), png(b'bad')], "context"
+    )
+
+    assert llm.single_calls == 2
+    assert descriptions[0] == "Image of a"
+    assert descriptions[2] == "Image of a\n\n(Duplicate of image 1)"
+    assert failed == 2
+
+
+def test_split_image_sections():
+    """Test: A multi-image response is split by '### Image K' headers, in the requested order."""
+    text = "Intro\n### Image 2\nSecond chart\n\n### Image 1 (Treatment)\nFirst mockup\n"
+    assert _split_image_sections(text, [1, 2]) == ["First mockup", "Second chart"]
+
+
+def test_split_image_sections_missing_section():
+    """Test: None is returned when an image has no (or an empty) section."""
+    assert _split_image_sections("### Image 1\nOnly one", [1, 2]) is None
+    assert _split_image_sections("### Image 1\n### Image 2\nSecond", [1, 2]) is None
+
+
+def test_analyze_images_grouped_call(monkeypatch):
+    """Test: Images sent in one call are split back into per-image descriptions."""
+    monkeypatch.setattr(google_docs_crawler, "IMAGES_PER_LLM_CALL", 4)
+    llm = FakeLLM(grouped_response="### Image 1\nTreatment\n### Image 2\nControl")
+    crawler = make_crawler(llm)
+
+    descriptions, failed = crawler._analyze_images_with_llm([png(b'a'), png(b'b')], "context")
+
+    assert descriptions == ["Treatment", "Control"]
+    assert failed == 0
+    assert llm.single_calls == 0
+
+
+def test_analyze_images_unsplittable_response_falls_back(monkeypatch):
+    """Test: A grouped response without per-image sections falls back to one call per image."""
+    monkeypatch.setattr(google_docs_crawler, "IMAGES_PER_LLM_CALL", 4)
+    llm = FakeLLM(grouped_response="Both images show a checkout page.")
+    crawler = make_crawler(llm)
+
+    descriptions, failed = crawler._analyze_images_with_llm([png(b'a'), png(b'b')], "context")
+
+    assert descriptions == ["Image of a", "Image of b"]
+    assert failed == 0
+    assert llm.single_calls == 2
+
+
+def test_disk_cache_keeps_latest_revision_only(tmp_path, monkeypatch):
+    """Test: Caching a new revision removes the doc's older revisions and expired entries."""
+    monkeypatch.setattr(google_docs_crawler, "DOC_CACHE_DIR", tmp_path / "gdocs")
+    crawler = make_crawler(FakeLLM())
+    crawler._doc_cache = OrderedDict()
+    crawler._doc_cache_lock = threading.Lock()
+
+    crawler._cache_content(("doc", "rev1", True, True), GoogleDocContent(doc_id="doc"))
+    crawler._cache_content(("other", "rev1", True, True), GoogleDocContent(doc_id="other"))
+    expired = crawler._cache_path(("other", "rev1", True, True))
+    old = time.time() - (google_docs_crawler.DOC_CACHE_MAX_AGE_DAYS + 1) * 86400
+    os.utime(expired, (old, old))
+    crawler._cache_content(("doc", "rev2", True, True), GoogleDocContent(doc_id="doc"))
+
+    assert sorted(p.name for p in (tmp_path / "gdocs").iterdir()) == ["doc.rev2.11.json"]
+    assert (tmp_path / "gdocs").stat().st_mode & 0o777 == 0o700
+
+
+def test_disk_cache_expired_entry_is_a_miss(tmp_path, monkeypatch):
+    """Test: An entry older than the max age is not served from disk."""
+    monkeypatch.setattr(google_docs_crawler, "DOC_CACHE_DIR", tmp_path)
+    crawler = make_crawler(FakeLLM())
+    crawler._doc_cache = OrderedDict()
+    crawler._doc_cache_lock = threading.Lock()
+    key = ("doc", "rev1", True, True)
+    crawler._cache_content(key, GoogleDocContent(doc_id="doc"))
+    crawler._doc_cache.clear()
+
+    assert crawler._get_cached_content(key).doc_id == "doc"
+    crawler._doc_cache.clear()
+    old = time.time() - (google_docs_crawler.DOC_CACHE_MAX_AGE_DAYS + 1) * 86400
+    os.utime(crawler._cache_path(key), (old, old))
+    assert crawler._get_cached_content(key) is None
+
+
+def test_combined_summary():
+    """Test: The summary has title, truncated text and numbered image sections."""
+    content = GoogleDocContent(
+        doc_id="doc",
+        title="Brief",
+        text_content="x" * 5001,
+        image_descriptions=["Chart"]
+    )
+    summary = make_crawler(FakeLLM())._create_combined_summary(content)
+    assert summary == (
+        "# Brief\n\n## Document Content\n" + "x" * 5000 + "...[truncated]\n\n"
+        "\n## Image Analysis (1 images)\n\n\n### Image 1\nChart\n"
+    )
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for RateLimiter.
+
+Run:
+    python -m pytest tests/test_rate_limiter.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import rate_limiter
+from utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """monotonic() and sleep() that advance a virtual clock."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_rejects_non_positive_rate():
+    """Test: A rate of zero or less is rejected."""
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_spaces_calls_evenly(clock):
+    """Test: Back-to-back calls start one interval apart."""
+    limiter = RateLimiter(rate=4)
+    starts = []
+    for _ in range(3):
+        with limiter:
+            starts.append(clock.now)
+    assert starts == [100.0, 100.25, 100.5]
+
+
+def test_idle_time_is_not_banked(clock):
+    """Test: After an idle period the next call starts immediately, but no burst builds up."""
+    limiter = RateLimiter(rate=2)
+    limiter.acquire()
+    clock.now += 10
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [0.5]
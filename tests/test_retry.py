@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for retry_with_backoff.
+
+Run:
+    python -m pytest tests/test_retry.py -v
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import retry
+from utils.retry import is_retryable, retry_with_backoff
+
+
+class FakeHTTPError(Exception):
+    """requests-style HTTPError carrying a response with a status and headers."""
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(retry.time, "sleep", delays.append)
+    return delays
+
+
+def flaky(errors, result="ok"):
+    """Function raising the given errors in turn, then returning result."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_is_retryable():
+    """Test: Rate limits, server errors and connection failures are retried; client errors are not."""
+    assert is_retryable(FakeHTTPError(429))
+    assert is_retryable(FakeHTTPError(503))
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(FakeHTTPError(403))
+    assert not is_retryable(FakeHTTPError(404))
+    assert not is_retryable(ValueError())
+
+
+def test_retries_transient_errors(sleeps):
+    """Test: Transient failures are retried until the call succeeds."""
+    fn, calls = flaky([FakeHTTPError(500), ConnectionError()])
+    assert retry_with_backoff(max_tries=5, base=1.0, cap=30.0)(fn)() == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert 1.0 <= sleeps[0] < 2.0 and 2.0 <= sleeps[1] < 3.0
+
+
+def test_non_retryable_error_raised_immediately(sleeps):
+    """Test: A client error is raised on the first attempt."""
+    fn, calls = flaky([FakeHTTPError(404)])
+    with pytest.raises(FakeHTTPError):
+        retry_with_backoff()(fn)()
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_gives_up_after_max_tries(sleeps):
+    """Test: The last error is raised once max_tries attempts have failed."""
+    fn, calls = flaky([FakeHTTPError(503)] * 3)
+    with pytest.raises(FakeHTTPError):
+        retry_with_backoff(max_tries=3)(fn)()
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_honors_retry_after(sleeps):
+    """Test: A server-provided Retry-After delay replaces the computed backoff."""
+    fn, _ = flaky([FakeHTTPError(429, {'Retry-After': '7'})])
+    retry_with_backoff()(fn)()
+    assert sleeps == [7.0]
+
+
+def test_retry_after_capped(sleeps):
+    """Test: A server-provided Retry-After longer than cap is clamped to cap."""
+    fn, _ = flaky([FakeHTTPError(429, {'Retry-After': '3600'})])
+    retry_with_backoff(cap=30.0)(fn)()
+    assert sleeps == [30.0]
@@ -8,7 +8,7 @@ Supports multiple LLM providers through Portkey gateway.
 
 import os
 import base64
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -32,6 +32,10 @@ except ImportError:
         OPENAI_AVAILABLE = False
 
 
+# Attempts after the first for transient LLM failures (rate limits, 5xx)
+LLM_MAX_RETRIES = 4
+
+
 class PortkeyLLM:
     """
     Shared LLM utility class for text and vision analysis using Portkey.
@@ -72,6 +76,9 @@ class PortkeyLLM:
             self.client = openai.OpenAI(
                 api_key="dummy",  # Required by OpenAI SDK but ignored by Portkey
                 base_url=base_url,
+                # The SDK retries 429/5xx and connection errors with exponential
+                # backoff, honoring Retry-After
+                max_retries=LLM_MAX_RETRIES,
                 default_headers={
                     "X-Portkey-API-Key": portkey_api_key,
                     "X-Portkey-Virtual-Key": portkey_virtual_key
@@ -156,31 +163,94 @@ class PortkeyLLM:
                 self.logger.error(f"Image file not found: {image_path}")
                 return None
             
-            # Read and encode image
+            # Read image
             with open(image_path, 'rb') as f:
                 image_data = f.read()
+        except Exception as e:
+            self.logger.error(f"Error in image analysis: {e}")
+            return None
+        
+        # Determine image format
+        image_format = image_path.suffix.lower().lstrip('.')
+        if image_format == 'jpg':
+            image_format = 'jpeg'
+        
+        return self.analyze_image_bytes(
+            image_bytes=image_data,
+            prompt=prompt,
+            mime_type=f"image/{image_format}",
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+    
+    def analyze_image_bytes(self,
+                            image_bytes: bytes,
+                            prompt: str,
+                            mime_type: str = "image/png",
+                            model: str = "gpt-4o",
+                            max_tokens: int = 1000,
+                            temperature: float = 0.1) -> Optional[str]:
+        """
+        Analyze in-memory image data using vision LLM (no temp file needed).
+        
+        Args:
+            image_bytes: Raw image data
+            prompt: Analysis prompt/instruction
+            mime_type: Image MIME type, e.g. image/png or image/jpeg
+            model: Vision-capable LLM model to use
+            max_tokens: Maximum response tokens
+            temperature: Response randomness (0.0-1.0)
             
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
+        Returns:
+            LLM response or None if failed
+        """
+        return self.analyze_images_in_one_call(
+            images=[(image_bytes, mime_type)],
+            prompt=prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+    
+    def analyze_images_in_one_call(self,
+                                   images: List[Tuple[bytes, str]],
+                                   prompt: str,
+                                   model: str = "gpt-4o",
+                                   max_tokens: int = 1000,
+                                   temperature: float = 0.1) -> Optional[str]:
+        """
+        Analyze several in-memory images with a single vision LLM request.
+        
+        The images are attached after the prompt, in order, so the model can
+        cross-reference them; the prompt should say how to lay out the answer.
+        
+        Args:
+            images: Images as (raw bytes, MIME type)
+            prompt: Analysis prompt/instruction
+            model: Vision-capable LLM model to use
+            max_tokens: Maximum response tokens (for all images together)
+            temperature: Response randomness (0.0-1.0)
             
-            # Determine image format
-            image_format = image_path.suffix.lower().lstrip('.')
-            if image_format == 'jpg':
-                image_format = 'jpeg'
+        Returns:
+            LLM response or None if failed
+        """
+        if not self.client:
+            self.logger.debug("Portkey client not initialized - LLM analysis unavailable")
+            return None
+        
+        try:
+            content = [{"type": "text", "text": prompt}]
+            for image_bytes, mime_type in images:
+                image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{mime_type};base64,{image_base64}"
+                    }
+                })
             
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/{image_format};base64,{image_base64}"
-                            }
-                        }
-                    ]
-                }
-            ]
+            messages = [{"role": "user", "content": content}]
             
             response = self.client.chat.completions.create(
                 model=model,
@@ -190,7 +260,8 @@ class PortkeyLLM:
             )
             
             result = response.choices[0].message.content
-            self.logger.info(f"Image analysis completed: {image_path.name} -> {len(result)} chars")
+            total_bytes = sum(len(image_bytes) for image_bytes, _ in images)
+            self.logger.info(f"Image analysis completed: {len(images)} image(s), {total_bytes} bytes -> {len(result)} chars")
             return result
             
         except Exception as e:
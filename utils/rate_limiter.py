@@ -0,0 +1,52 @@
+"""
+Thread-safe rate limiter.
+
+Spaces calls evenly so that at most `rate` calls start per `per` seconds,
+shared across all threads using the same limiter instance.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Limit how often an operation may start, across threads.
+    
+    Usage:
+        limiter = RateLimiter(rate=10)  # 10 calls per second
+        with limiter:
+            call_api()
+    """
+    
+    def __init__(self, rate: float, per: float = 1.0):
+        """
+        Initialize the limiter.
+        
+        Args:
+            rate: Number of calls allowed per period
+            per: Period length in seconds (default: 1 second)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = per / rate
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+    
+    def acquire(self):
+        """Block until the caller may start its call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
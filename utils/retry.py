@@ -0,0 +1,91 @@
+"""
+Retry with exponential backoff for transient HTTP failures.
+
+Retries rate limiting (429), server errors (5xx) and connection failures,
+honoring a server-provided Retry-After delay when there is one. Other errors
+(e.g. 403/404) are raised immediately.
+"""
+
+import functools
+import random
+import time
+from typing import Callable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _http_status(error: Exception) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError or requests HTTPError, if any."""
+    # googleapiclient HttpError carries an httplib2 response in .resp
+    resp = getattr(error, 'resp', None)
+    if resp is not None and getattr(resp, 'status', None) is not None:
+        return int(resp.status)
+    # requests HTTPError carries the response in .response
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-provided Retry-After delay in seconds, if any."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers is None:
+        # httplib2 responses are dicts with lowercased header names
+        headers = getattr(error, 'resp', None)
+    try:
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error is a transient failure worth retrying."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = _http_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # requests' connection errors and timeouts don't subclass the builtins
+    return type(error).__name__ in ('ConnectionError', 'Timeout', 'ReadTimeout', 'ConnectTimeout')
+
+
+def retry_with_backoff(max_tries: int = 5, base: float = 1.0, cap: float = 30.0) -> Callable:
+    """
+    Decorator retrying transient failures with exponential backoff and jitter.
+
+    Args:
+        max_tries: Total attempts, including the first
+        base: Delay before the first retry, in seconds (doubles each retry)
+        cap: Maximum delay between attempts, in seconds (also bounds Retry-After)
+
+    Usage:
+        @retry_with_backoff(max_tries=5)
+        def fetch():
+            ...
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_tries - 1 or not is_retryable(e):
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = min(cap, base * 2 ** attempt) + random.random()
+                    else:
+                        delay = min(cap, delay)
+                    logger.warning(f"Transient error in {fn.__name__} ({e}); retrying in {delay:.1f}s "
+                                   f"(attempt {attempt + 2}/{max_tries})")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
@@ -1,7 +1,7 @@
 
 import os
 import datetime
-from typing import Optional, Union
+from typing import Iterator, List, Optional, Union
 from pathlib import Path
 from dotenv import load_dotenv
 import pandas as pd
@@ -149,6 +149,8 @@ class SnowflakeHook:
         # Initialize connection attributes
         self.conn = None
         self.cursor = None
+        # Rows reported by the most recent pandas write (write_pandas return value)
+        self.last_write_num_rows = None
 
         # Setup Spark parameters if Spark is available
         if PYSPARK_AVAILABLE:
@@ -291,7 +293,7 @@ class SnowflakeHook:
             logger.error(f"Failed to create optimized Spark session: {str(e)}")
             raise
 
-    def query_snowflake(self, query: str, method: Optional[str] = 'pandas'):
+    def query_snowflake(self, query: str, method: Optional[str] = 'pandas', params: Optional[dict] = None):
         """
         Execute a query against Snowflake.
 
@@ -301,13 +303,20 @@ class SnowflakeHook:
                 - 'pandas': Uses the Snowflake connector with pandas (default)
                 - 'spark': Uses PySpark with optimized network settings for local execution
                 - 'polars': Uses Polars DataFrame library (if available)
+                - 'arrow': Fetches the Arrow result batches and converts them to a
+                  pandas DataFrame block by block, releasing Arrow buffers as it
+                  goes (lower peak memory for large results)
+            params: Bind parameters for %(name)s placeholders (pyformat, so a literal
+                '%' in the query must be written '%%'). The connector escapes and
+                substitutes them client-side. Queries with params always run
+                through the connector ('pandas' or 'arrow').
 
         Returns:
             pandas.DataFrame, pyspark.sql.DataFrame, polars.DataFrame: Query results
-            Return type depends on the method parameter
+            Return type depends on the method parameter ('arrow' returns pandas)
         """
 
-        if method == 'spark' and PYSPARK_AVAILABLE and self.spark is not None:
+        if method == 'spark' and PYSPARK_AVAILABLE and self.spark is not None and params is None:
             # Spark method (only if available)
             try:
                 logger.info(f"Executing query (spark): {query[:100]}...")
@@ -323,7 +332,7 @@ class SnowflakeHook:
                 logger.error(f"Error executing spark query: {str(e)}")
                 raise
 
-        elif method == 'polars' and POLARS_AVAILABLE and SQLALCHEMY_AVAILABLE:
+        elif method == 'polars' and POLARS_AVAILABLE and SQLALCHEMY_AVAILABLE and params is None:
             # Polars method (only if available)
             try:
                 logger.info(f"Executing query (polars): {query[:100]}...")
@@ -334,6 +343,30 @@ class SnowflakeHook:
             except Exception as e:
                 logger.error(f"Error executing polars query: {str(e)}")
                 raise
+        elif method == 'arrow':
+            # Arrow method
+            try:
+                if not self.conn:
+                    self.connect()
+
+                logger.info("Executing query (arrow)")
+                self.cursor = self.conn.cursor()
+                self.cursor.execute(query, params)
+                table = self.cursor.fetch_arrow_all()
+
+                if table is None:
+                    # No rows: keep the column names from the result metadata
+                    df = pd.DataFrame(columns=[col[0] for col in self.cursor.description])
+                else:
+                    df = table.to_pandas(split_blocks=True, self_destruct=True)
+                    del table
+
+                # Convert column names to lowercase
+                df.columns = map(str.lower, df.columns)
+                return df
+            except Exception as e:
+                logger.error(f"Error executing arrow query: {str(e)}")
+                raise
         else:
             # Pandas method
             try:
@@ -344,7 +377,7 @@ class SnowflakeHook:
                 # Execute query
                 logger.info("Executing query (pandas)")
                 self.cursor = self.conn.cursor()
-                self.cursor.execute(query)
+                self.cursor.execute(query, params)
                 df = self.cursor.fetch_pandas_all()
 
                 # Convert column names to lowercase
@@ -354,12 +387,46 @@ class SnowflakeHook:
                 logger.error(f"Error executing pandas query: {str(e)}")
                 raise
 
+    def query_snowflake_batches(self, query: str, params: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        """
+        Execute a query and yield the result as a series of pandas DataFrames.
+
+        Each DataFrame is one Arrow result batch (as downloaded from Snowflake), so
+        the full result is never held in memory at once.
+
+        Args:
+            query: SQL query to execute
+            params: Bind parameters for %(name)s placeholders (see query_snowflake)
+
+        Yields:
+            pandas.DataFrame: One batch of rows, with lowercase column names
+        """
+        try:
+            if not self.conn:
+                self.connect()
+
+            logger.info("Executing query (arrow batches)")
+            cursor = self.conn.cursor()
+            self.cursor = cursor
+            cursor.execute(query, params)
+        except Exception as e:
+            logger.error(f"Error executing batched query: {str(e)}")
+            raise
+
+        for table in cursor.fetch_arrow_batches():
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            df.columns = map(str.lower, df.columns)
+            yield df
+
     def query_without_result(self, query: str):
         """
         Run a query without returning a result.
 
         Args:
             query: SQL query to execute
+
+        Returns:
+            int: Number of rows affected (for DML statements such as DELETE)
         """
         try:
             # Connect if not already connected
@@ -367,6 +434,7 @@ class SnowflakeHook:
                 self.connect()
             self.cursor = self.conn.cursor()
             self.cursor.execute(query)
+            return self.cursor.rowcount
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             raise
@@ -406,7 +474,8 @@ class SnowflakeHook:
 
         return False  # Re-raise any exceptions that occurred
 
-    def write_to_snowflake(self, df, table_name: str, mode: str = "append", method: str = "pandas"):
+    def write_to_snowflake(self, df, table_name: str, mode: str = "append", method: str = "pandas",
+                           grant: bool = True, **write_pandas_kwargs):
         """
         Write a DataFrame to a Snowflake table.
 
@@ -418,9 +487,16 @@ class SnowflakeHook:
                 - 'pandas': Uses the Snowflake connector with pandas (default)
                 - 'spark': Uses PySpark with optimized network settings
                 - 'polars': Uses Polars DataFrame library (if available)
+            grant: Grant access on the table after writing (see grant_access). Off
+                for short-lived tables such as staging tables.
+            **write_pandas_kwargs: Extra options forwarded to write_pandas for the
+                'pandas' method (e.g. compression='snappy', parallel=8,
+                use_logical_type=True). write_pandas stages the frame as Parquet
+                files and loads them with PUT + COPY INTO.
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False otherwise. For the 'pandas' method the
+            number of rows written is kept in self.last_write_num_rows.
 
         """
         if method == 'pandas':
@@ -436,9 +512,12 @@ class SnowflakeHook:
                     table_name=table_name,
                     database=self.database,
                     schema=self.schema,
-                    quote_identifiers=False
+                    quote_identifiers=False,
+                    **write_pandas_kwargs
                 )
-                self.grant_access(table_name)
+                self.last_write_num_rows = num_rows
+                if grant:
+                    self.grant_access(table_name)
                 logger.info(f"Successfully wrote {num_rows} rows to {table_name}")
                 return success
             except Exception as e:
@@ -466,7 +545,8 @@ class SnowflakeHook:
                     .option("dbtable", table_name) \
                     .mode(mode) \
                     .save()
-                self.grant_access(table_name)
+                if grant:
+                    self.grant_access(table_name)
                 logger.info(f"Successfully wrote DataFrame to {table_name} using Spark")
                 return True
             except Exception as e:
@@ -477,10 +557,13 @@ class SnowflakeHook:
             if method != 'pandas':
                 logger.warning(f"Method '{method}' not supported or required packages not available. Using pandas instead.")
 
-            return self.write_to_snowflake(df, table_name, mode, method='pandas')
+            return self.write_to_snowflake(df, table_name, mode, method='pandas', grant=grant,
+                                           **write_pandas_kwargs)
 
     def infer_create_table(self, df: Union[pd.DataFrame, SparkDataFrame], table_name: str,
-                           schema: Optional[str] = None, database: Optional[str] = None) -> tuple:
+                           schema: Optional[str] = None, database: Optional[str] = None,
+                           if_not_exists: bool = False,
+                           cluster_by: Optional[List[str]] = None) -> tuple:
         """
         Infer a CREATE TABLE statement and prepare the data for upload from a DataFrame.
 
@@ -489,6 +572,11 @@ class SnowflakeHook:
             table_name: Name of the target table
             schema: Schema name to use (defaults to self.schema if None)
             database: Database name to use (defaults to self.database if None)
+            if_not_exists: Emit CREATE TABLE IF NOT EXISTS (keeps an existing table)
+                instead of CREATE OR REPLACE TABLE
+            cluster_by: Optional clustering key expressions, e.g.
+                ['TO_DATE(fetched_at)', 'view_name']. Queries filtering on the same
+                expressions can prune micro-partitions.
 
         Returns:
             tuple: (create_table_sql, prepared_dataframe)
@@ -505,7 +593,10 @@ class SnowflakeHook:
 
         # Start building the create table statement
         fully_qualified_table = f"{database}.{schema}.{table_name}"
-        create_table = f"CREATE OR REPLACE TABLE {fully_qualified_table} ("
+        if if_not_exists:
+            create_table = f"CREATE TABLE IF NOT EXISTS {fully_qualified_table} ("
+        else:
+            create_table = f"CREATE OR REPLACE TABLE {fully_qualified_table} ("
 
         # Process based on DataFrame type
         if isinstance(df, pd.DataFrame):
@@ -521,7 +612,11 @@ class SnowflakeHook:
             # Add each column with appropriate type
             for i, (col, dtype) in enumerate(df.dtypes.items()):
                 # Convert pandas dtype to Snowflake type
-                if pd.api.types.is_object_dtype(dtype):
+                if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+                    # Includes pandas string dtypes (e.g. string[pyarrow])
+                    sf_type = "STRING"
+                elif isinstance(dtype, pd.CategoricalDtype):
+                    # Categoricals are uploaded as their (string) category values
                     sf_type = "STRING"
                 elif pd.api.types.is_integer_dtype(dtype):
                     sf_type = "INTEGER"
@@ -548,6 +643,8 @@ class SnowflakeHook:
 
             # Close the parenthesis
             create_table += ")"
+            if cluster_by:
+                create_table += f" CLUSTER BY ({', '.join(cluster_by)})"
 
             # Handle timestamp columns for upload
             for col in timestamp_cols:
@@ -611,6 +708,8 @@ class SnowflakeHook:
 
             # Close the parenthesis
             create_table += ")"
+            if cluster_by:
+                create_table += f" CLUSTER BY ({', '.join(cluster_by)})"
 
             # For Spark, we don't need to modify the DataFrame before upload
             return create_table, df
@@ -619,7 +718,8 @@ class SnowflakeHook:
 
     def create_and_populate_table(self, df: Union[pd.DataFrame, SparkDataFrame], table_name: str,
                                  schema: Optional[str] = None, database: Optional[str] = None,
-                                 method: Optional[str] = None) -> bool:
+                                 method: Optional[str] = None, grant: bool = True,
+                                 **write_pandas_kwargs) -> bool:
         """
         Create a new table based on DataFrame schema and populate it with data.
 
@@ -630,6 +730,8 @@ class SnowflakeHook:
             database: Database name to use (defaults to self.database if None)
             method: Method to use for data upload ('pandas' or 'spark').
                    If None, auto-detects based on DataFrame type.
+            grant: Grant access on the new table (see write_to_snowflake)
+            **write_pandas_kwargs: Extra options forwarded to write_to_snowflake
 
         Returns:
             bool: True if successful
@@ -661,7 +763,9 @@ class SnowflakeHook:
                 df=prepared_df,
                 table_name=table_name,
                 mode="append",
-                method=method
+                method=method,
+                grant=grant,
+                **write_pandas_kwargs
             )
 
             return success